@@ -0,0 +1,157 @@
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, QPointF, QTimer
+from PyQt6.QtWidgets import QGraphicsItem
+
+
+class MoveAnimation:
+    """Linear movement of an item towards a target position"""
+
+    __slots__ = ("item", "start", "target", "start_time", "duration")
+
+    def __init__(self, item: QGraphicsItem, target: QPointF, start_time: float, duration: float):
+        self.item: QGraphicsItem = item
+        self.start: QPointF = item.pos()
+        self.target: QPointF = target
+        self.start_time: float = start_time
+        self.duration: float = duration
+
+
+class Explosion:
+    """Fragments flying away from a captured piece while fading out"""
+
+    __slots__ = ("fragments", "start_time", "on_finished")
+
+    def __init__(self, fragments: List[Tuple[QGraphicsItem, QPointF, QPointF]], start_time: float,
+                 on_finished: Optional[Callable[[List[QGraphicsItem]], None]] = None):
+        self.fragments: List[Tuple[QGraphicsItem, QPointF, QPointF]] = fragments
+        self.start_time: float = start_time
+        self.on_finished = on_finished
+
+    def end(self):
+        """Hide the fragments and hand them back"""
+        items = [item for item, _, _ in self.fragments]
+        for item in items:
+            item.hide()
+        if self.on_finished is not None:
+            self.on_finished(items)
+
+
+class AnimationScheduler(QObject):
+    """
+    Single driver for every animation of the board
+
+    One timer advances all active piece moves and explosions at each frame.
+    Positions are interpolated from the elapsed time, so animations keep the same duration
+    whatever the frame rate, and the timer only runs while something is animated.
+    When animations are disabled, items are put at their final state immediately
+    """
+
+    FRAME_INTERVAL = 16
+    # Speed of the pieces, in pixels per second
+    MOVE_SPEED = 625
+    # Duration of the fragments' flight and fade out, in seconds
+    EXPLOSION_DURATION = 0.8
+    FADE_DURATION = 0.5
+
+    def __init__(self, parent: QObject = None):
+        super().__init__(parent)
+        self.enabled: bool = True
+        self.moves: Dict[int, MoveAnimation] = {}
+        self.explosions: List[Explosion] = []
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.FRAME_INTERVAL)
+        self.timer.timeout.connect(self.tick)
+
+    def set_enabled(self, enabled: bool):
+        """
+        Enable or disable animations. Running animations are finished when disabled
+        :param enabled: ``False`` to skip animations completely
+        """
+        self.enabled = enabled
+        if not enabled:
+            self.finish()
+
+    def move(self, item: QGraphicsItem, target: QPointF):
+        """
+        Move an item to a position. A running movement of the same item is retargeted
+        :param item: The item to move
+        :param target: The position to reach, in scene coordinates
+        """
+        if not self.enabled:
+            self.moves.pop(id(item), None)
+            item.setPos(target)
+            return
+
+        delta = target - item.pos()
+        distance = (delta.x() ** 2 + delta.y() ** 2) ** 0.5
+        self.moves[id(item)] = MoveAnimation(item, target, time.perf_counter(), distance / self.MOVE_SPEED)
+        self.timer.start()
+
+    def cancel(self, item: QGraphicsItem):
+        """
+        Stop the movement of an item where it is, e.g. before it is reused
+        :param item: The moving item
+        """
+        self.moves.pop(id(item), None)
+
+    def explode(self, fragments: List[Tuple[QGraphicsItem, QPointF]],
+                on_finished: Optional[Callable[[List[QGraphicsItem]], None]] = None):
+        """
+        Animate the fragments of a captured piece
+        :param fragments: The fragment items, already placed in the scene, with their final positions
+        :param on_finished: Called with the fragment items once they are hidden, so they can be reused
+        """
+        explosion = Explosion(
+            [(item, item.pos(), target) for item, target in fragments],
+            time.perf_counter(),
+            on_finished,
+        )
+        if not self.enabled:
+            explosion.end()
+            return
+
+        self.explosions.append(explosion)
+        self.timer.start()
+
+    def tick(self):
+        """Advance every animation to the current time"""
+        now = time.perf_counter()
+
+        for key, animation in list(self.moves.items()):
+            progress = 1.0
+            if animation.duration > 0:
+                progress = min(1.0, (now - animation.start_time) / animation.duration)
+            animation.item.setPos(animation.start + (animation.target - animation.start) * progress)
+            if progress >= 1.0:
+                del self.moves[key]
+
+        for explosion in list(self.explosions):
+            elapsed = now - explosion.start_time
+            progress = min(1.0, elapsed / self.EXPLOSION_DURATION)
+            opacity = max(0.0, 1.0 - elapsed / self.FADE_DURATION)
+            for item, start, target in explosion.fragments:
+                item.setPos(start + (target - start) * progress)
+                item.setOpacity(opacity)
+            if progress >= 1.0:
+                self.explosions.remove(explosion)
+                explosion.end()
+
+        if not self.moves and not self.explosions:
+            self.timer.stop()
+
+    def finish(self):
+        """Put every animated item at its final state and stop the animations"""
+        for animation in self.moves.values():
+            animation.item.setPos(animation.target)
+        explosions = self.explosions
+        self.clear()
+        for explosion in explosions:
+            explosion.end()
+
+    def clear(self):
+        """Forget every animation without finishing it, e.g. before the items are deleted"""
+        self.moves = {}
+        self.explosions = []
+        self.timer.stop()
@@ -0,0 +1,70 @@
+"""
+Compact board encoding
+
+Each tile is stored as a single ``uint8``:
+
+- ``EMPTY`` (0) for an empty tile
+- ``HOLE`` (255) for a tile which is not part of the board (``XX``)
+- ``(color_index << 3) | (type_index + 1)`` for a piece, where the indices refer to ``COLORS`` and ``PIECES``
+
+The piece type and color can therefore be extracted with ``code & TYPE_MASK`` and ``code >> 3``,
+which also works on whole arrays.
+"""
+
+import numpy as np
+
+PIECES = "kqnbrp"
+COLORS = "wbry"
+
+EMPTY = 0
+HOLE = 255
+TYPE_MASK = 7
+COLOR_SHIFT = 3
+
+
+def piece_code(piece_type: str, color: str) -> int:
+    """
+    Get the code of a piece
+    :param piece_type: The piece type (``k``, ``q``, ``n``, ``b``, ``r`` or ``p``)
+    :param color: The piece color (``w``, ``b``, ``r`` or ``y``)
+    :return: The piece code
+    """
+    return (COLORS.index(color) << COLOR_SHIFT) | (PIECES.index(piece_type) + 1)
+
+
+STRING_TO_CODE: dict[str, int] = {"": EMPTY, "XX": HOLE}
+for _color in COLORS:
+    for _piece in PIECES:
+        STRING_TO_CODE[_piece + _color] = piece_code(_piece, _color)
+
+CODE_TO_STRING = np.full(256, "", dtype=object)
+for _string, _code in STRING_TO_CODE.items():
+    CODE_TO_STRING[_code] = _string
+
+
+def encode(board) -> np.ndarray:
+    """
+    Encode a board into a compact code array
+    :param board: A 2D array of tile descriptions (strings or pieces)
+    :return: A ``uint8`` array of the same shape
+    """
+    board = np.asarray(board, dtype=object)
+    codes = np.empty(board.shape, dtype=np.uint8)
+    for y in range(board.shape[0]):
+        for x in range(board.shape[1]):
+            tile = board[y, x]
+            if tile is None:
+                tile = ""
+            elif type(tile) is not str:
+                tile = tile.string()
+            codes[y, x] = STRING_TO_CODE[tile]
+    return codes
+
+
+def decode(codes: np.ndarray) -> np.ndarray:
+    """
+    Decode a code array into a board of strings
+    :param codes: A ``uint8`` code array
+    :return: An object array of tile descriptions
+    """
+    return CODE_TO_STRING[codes]
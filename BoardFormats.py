@@ -0,0 +1,617 @@
+"""
+Parsers for the board file formats
+
+These functions don't depend on Qt, so that boards can be read by command-line tools
+and worker processes. Boards are returned as string matrices (``""`` for empty tiles),
+together with the player sequence. See :meth:`BoardManager.BoardManager.load_file` for a description of the formats.
+"""
+
+import os
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+import BoardCodes
+
+
+PIECE_TYPES = ("p", "r", "n", "b", "k", "q")
+
+# Tile descriptions by FEN character, holes being written ``*`` like in some variant notations
+FEN_HOLE = "*"
+FEN_TILES: Dict[str, str] = {FEN_HOLE: "XX"}
+for _piece in PIECE_TYPES:
+    FEN_TILES[_piece.upper()] = _piece + "w"
+    FEN_TILES[_piece] = _piece + "b"
+FEN_CHARS: Dict[str, str] = {tile: char for char, tile in FEN_TILES.items()}
+
+
+def parse_brd(data: str) -> Optional[Tuple[str, np.ndarray]]:
+    """
+    Parse a board description (.brd)
+    :param data: The content of the file
+    :return: The player sequence and the board, or ``None`` if the description is invalid
+    """
+    lines = data.split("\n")
+    rows = [
+        line.replace('--', '').strip().split(",")
+        for line in lines[1:]
+    ]
+    rows = list(filter(lambda r: len(r) != 0, rows))
+    if len(rows) == 0:
+        print("Board must have at least one row")
+        return None
+
+    width = len(rows[0])
+
+    #   check lines length equals
+    for row in rows:
+        if len(row) != width:
+            print("All rows must have the same width")
+            return None
+
+    return lines[0].strip(), np.array(rows, dtype='O')
+
+
+class FenPosition:
+    """
+    Every field of a FEN line
+
+    The board is a string matrix in FEN orientation, i.e. the first row is the 8th rank
+    (black's side) and the first column is the a-file
+    """
+
+    __slots__ = ("board", "side", "castling", "en_passant", "halfmove", "fullmove")
+
+    def __init__(self, board: np.ndarray, side: str = "w", castling: str = "-", en_passant: str = "-",
+                 halfmove: int = 0, fullmove: int = 1):
+        self.board: np.ndarray = board
+        self.side: str = side
+        self.castling: str = castling
+        self.en_passant: str = en_passant
+        self.halfmove: int = halfmove
+        self.fullmove: int = fullmove
+
+
+def decode_fen(data: str) -> Optional[FenPosition]:
+    """
+    Parse a FEN or X-FEN line in a single pass
+
+    Empty tile counts can have several digits, for boards wider than 9 tiles, and holes are written ``*``.
+    Missing fields get their default value, and EPD operations after the 4th field are ignored
+    :param data: A single FEN line
+    :return: The position, or ``None`` if the description is invalid
+    """
+    fields = data.split()
+    if len(fields) == 0:
+        print("FEN must at least contain the board state")
+        return None
+
+    rows = []
+    row = []
+    count = 0
+    for char in fields[0]:
+        if "0" <= char <= "9":
+            count = count * 10 + ord(char) - 48
+            continue
+        if count != 0:
+            row.extend([""] * count)
+            count = 0
+        if char == "/":
+            rows.append(row)
+            row = []
+            continue
+        tile = FEN_TILES.get(char)
+        if tile is None:
+            print(f"Invalid piece '{char}'")
+            return None
+        row.append(tile)
+    if count != 0:
+        row.extend([""] * count)
+    rows.append(row)
+
+    width = len(rows[0])
+    # Check lines length equals
+    for row in rows:
+        if len(row) != width:
+            print("All rows must have the same width")
+            return None
+
+    side = fields[1] if len(fields) > 1 else "w"
+    if side not in ("w", "b"):
+        print(f"Invalid player '{side}'")
+        return None
+
+    position = FenPosition(np.array(rows, dtype='O'), side)
+    if len(fields) > 2:
+        position.castling = fields[2]
+    if len(fields) > 3:
+        position.en_passant = fields[3]
+    if len(fields) > 5 and fields[4].isdigit() and fields[5].isdigit():
+        position.halfmove = int(fields[4])
+        position.fullmove = int(fields[5])
+    return position
+
+
+def position_to_board(position: FenPosition) -> Tuple[str, np.ndarray]:
+    """
+    Get the player sequence and the board of a FEN position
+    :param position: The position
+    :return: The player sequence, starting with the next player, and the board
+    """
+    if position.side == "w":
+        return "0w01b2", np.rot90(position.board, 2)
+    return "0b01w2", position.board
+
+
+def parse_fen(data: str) -> Optional[Tuple[str, np.ndarray]]:
+    """
+    Parse a FEN description
+    :param data: A single FEN line
+    :return: The player sequence and the board, or ``None`` if the description is invalid
+    """
+    position = decode_fen(data)
+    if position is None:
+        return None
+    return position_to_board(position)
+
+
+def format_brd(player_order: str, board: np.ndarray) -> str:
+    """
+    Describe a board in the .brd format
+    :param player_order: The player sequence
+    :param board: The board, as a string matrix
+    :return: The content of the file
+    """
+    lines = [player_order]
+    for row in board:
+        lines.append(",".join(tile if tile != "" else "--" for tile in row))
+    return "\n".join(lines)
+
+
+def encode_fen(position: FenPosition) -> str:
+    """
+    Describe a position in FEN, inverse of :func:`decode_fen`
+    :param position: The position, with white and black pieces only
+    :return: The FEN line
+    """
+    rows = []
+    for row in position.board.tolist():
+        parts = []
+        count = 0
+        for tile in row:
+            if tile == "":
+                count += 1
+                continue
+            if count != 0:
+                parts.append(str(count))
+                count = 0
+            parts.append(FEN_CHARS[tile])
+        if count != 0:
+            parts.append(str(count))
+        rows.append("".join(parts))
+    return (
+        f"{'/'.join(rows)} {position.side} {position.castling} {position.en_passant} "
+        f"{position.halfmove} {position.fullmove}"
+    )
+
+
+def format_fen(player_order: str, board: np.ndarray, castling: str = "-", en_passant: str = "-",
+               halfmove: int = 0, fullmove: int = 1) -> Optional[str]:
+    """
+    Describe a board in FEN, inverse of :func:`parse_fen`
+    :param player_order: The player sequence, the first player being the next to move
+    :param board: The board, as a string matrix
+    :param castling: The castling rights
+    :param en_passant: The en passant target square
+    :param halfmove: Number of plies since the last capture or pawn move
+    :param fullmove: Number of the current move, incremented after black's move
+    :return: The FEN line, or ``None`` if the board can't be described in FEN
+    """
+    colors = player_order[1::3]
+    if sorted(colors) != ["b", "w"]:
+        return None
+
+    # FEN lists the ranks from black's side
+    black_rotation = int(player_order[player_order.index("b") + 1])
+    return encode_fen(FenPosition(
+        np.rot90(board, black_rotation), colors[0], castling, en_passant, halfmove, fullmove
+    ))
+
+
+def castling_squares(position: FenPosition) -> Dict[str, Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """
+    Find the king and rook of each castling right, in FEN or X-FEN notation
+
+    ``K``/``Q`` refer to the outermost rook on the king's side or the queen's side of the back rank,
+    other letters to the rook on that file (e.g. ``C`` or ``g`` in Chess960).
+    Rights without a matching king and rook are ignored
+    :param position: The position
+    :return: The king and rook coordinates, in FEN orientation, by castling right
+    """
+    squares = {}
+    height, width = position.board.shape
+    for right in position.castling:
+        if not right.isalpha():
+            continue
+        color = "w" if right.isupper() else "b"
+        y = height - 1 if color == "w" else 0
+        row = list(position.board[y])
+        if "k" + color not in row:
+            continue
+        king = row.index("k" + color)
+        rooks = [x for x, tile in enumerate(row) if tile == "r" + color]
+
+        letter = right.upper()
+        if letter == "K":
+            rooks = [x for x in rooks if x > king][-1:]
+        elif letter == "Q":
+            rooks = [x for x in rooks if x < king][:1]
+        else:
+            rooks = [x for x in rooks if x == ord(letter) - ord("A")]
+        if rooks:
+            squares[right] = ((y, king), (y, rooks[0]))
+    return squares
+
+
+def parse_epd_operations(line: str) -> Dict[str, str]:
+    """
+    Parse the operations of an EPD line, e.g. ``bm Nf3; id "test 1";``
+    :param line: A FEN or EPD line
+    :return: The operands by opcode, without quotes. Empty for plain FEN lines
+    """
+    fields = line.strip().split(None, 4)
+    if len(fields) < 5 or ";" not in fields[4]:
+        return {}
+
+    operations = {}
+    for operation in fields[4].split(";"):
+        opcode, _, operand = operation.strip().partition(" ")
+        if opcode != "":
+            operations[opcode] = operand.strip().strip('"')
+    return operations
+
+
+class PositionFile:
+    """
+    File with one FEN or EPD position per line (.fen, .epd)
+
+    The file is scanned once to build the byte offset of every position, then positions
+    are read on demand by seeking, so files with millions of positions are never loaded in memory.
+    Empty lines and lines starting with ``#`` are ignored
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+
+        offsets = []
+        line_numbers = []
+        offset = 0
+        with open(path, "rb") as f:
+            for number, line in enumerate(f, 1):
+                stripped = line.strip()
+                if stripped != b"" and not stripped.startswith(b"#"):
+                    offsets.append(offset)
+                    line_numbers.append(number)
+                offset += len(line)
+
+        self.offsets: np.ndarray = np.array(offsets, dtype=np.int64)
+        self.line_numbers: np.ndarray = np.array(line_numbers, dtype=np.int64)
+
+    def __len__(self) -> int:
+        """Number of positions in the file"""
+        return len(self.offsets)
+
+    def line(self, index: int) -> str:
+        """
+        Get the raw line of a position
+        :param index: Index of the position, starting at 0
+        :return: The FEN or EPD line
+        """
+        with open(self.path, "rb") as f:
+            f.seek(int(self.offsets[index]))
+            return f.readline().decode().strip()
+
+    def name(self, index: int) -> str:
+        """
+        Get a description of a position for messages
+        :param index: Index of the position, starting at 0
+        :return: ``path:line``
+        """
+        return f"{self.path}:{self.line_numbers[index]}"
+
+    def __getitem__(self, index: int) -> Optional[Tuple[str, np.ndarray]]:
+        """
+        Parse a position
+        :param index: Index of the position, starting at 0
+        :return: The player sequence and the board, or ``None`` if the position is invalid
+        """
+        return parse_fen(self.line(index))
+
+    def position(self, index: int) -> Optional[FenPosition]:
+        """
+        Parse a position with every FEN field
+        :param index: Index of the position, starting at 0
+        :return: The position, or ``None`` if it is invalid
+        """
+        return decode_fen(self.line(index))
+
+    def operations(self, index: int) -> Dict[str, str]:
+        """
+        Get the EPD operations of a position (best move, id, ...)
+        :param index: Index of the position, starting at 0
+        :return: The operands by opcode
+        """
+        return parse_epd_operations(self.line(index))
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        """
+        Stream the positions in file order, reading the file sequentially
+        :return: An iterator of (index, line)
+        """
+        with open(self.path, "rb") as f:
+            for index, offset in enumerate(self.offsets):
+                f.seek(int(offset))
+                yield index, f.readline().decode().strip()
+
+
+PACKED_MAGIC = b"PBRD"
+PACKED_VERSION = 1
+# Magic, version, height, width, player sequence
+PACKED_HEADER = struct.Struct("<4sHHH32s")
+PACKED_HEADER_SIZE = 64
+
+
+def rotate_sequence(player_order: str, turn: int) -> str:
+    """
+    Rotate a player sequence so that a player comes first
+    :param player_order: The full player sequence
+    :param turn: Index of the player who comes first
+    :return: The rotated sequence
+    """
+    return player_order[3 * turn:] + player_order[:3 * turn]
+
+
+def align_position(player_order: str, order: str, board: np.ndarray) -> Optional[Tuple[int, np.ndarray]]:
+    """
+    Express a position in the orientation of another player sequence with the same players
+
+    The position then uses the team numbers of the reference sequence
+    :param player_order: The reference sequence
+    :param order: The sequence of the position, the first player being the next to move
+    :param board: The board of the position
+    :return: The index of the next player in the reference sequence and the rotated board,
+             or ``None`` if the players don't match
+    """
+    for turn in range(len(player_order) // 3):
+        rotated = rotate_sequence(player_order, turn)
+        if rotated[1::3] != order[1::3]:
+            continue
+        # Team numbers are only labels, the players must be grouped the same way
+        teams = set(zip(rotated[0::3], order[0::3]))
+        if len(teams) != len({team for team, _ in teams}) or len(teams) != len({team for _, team in teams}):
+            continue
+        # Each player must see the same board in both orientations
+        offsets = {(int(a) - int(b)) % 4 for a, b in zip(rotated[2::3], order[2::3])}
+        if len(offsets) == 1:
+            return turn, np.rot90(board, -offsets.pop())
+    return None
+
+
+def packed_dtype(shape: Tuple[int, int]) -> np.dtype:
+    """
+    Get the record type of a packed position file: the index of the next player
+    in the sequence, then the board codes (see :mod:`BoardCodes`)
+    :param shape: The board shape
+    :return: The record type
+    """
+    return np.dtype([("turn", np.uint8), ("codes", np.uint8, shape)])
+
+
+def write_packed(path: str, player_order: str, codes: np.ndarray, turns=None, append: bool = False) -> bool:
+    """
+    Write positions in the packed binary format (.pbrd)
+
+    The file starts with a ``PACKED_HEADER_SIZE`` bytes header (see ``PACKED_HEADER``),
+    followed by fixed-size records (see :func:`packed_dtype`), so it can be memory-mapped
+    :param path: The path to the file
+    :param player_order: The player sequence shared by every position
+    :param codes: A code array of shape (height, width), or (count, height, width) for several positions
+    :param turns: Index of the next player in the sequence for each position, 0 by default
+    :param append: If ``True``, the positions are added at the end of an existing file
+                   with the same player sequence and board shape
+    :return: ``True`` if successful, ``False`` otherwise
+    """
+    codes = np.asarray(codes, dtype=np.uint8)
+    if codes.ndim == 2:
+        codes = codes[np.newaxis]
+    shape = codes.shape[1:]
+    if len(player_order) > 32:
+        print("Player sequence too long for the packed format")
+        return False
+
+    records = np.empty(len(codes), dtype=packed_dtype(shape))
+    records["turn"] = 0 if turns is None else turns
+    records["codes"] = codes
+
+    if append and os.path.isfile(path) and os.path.getsize(path) > 0:
+        header = read_packed_header(path)
+        if header is None:
+            return False
+        if header != (player_order, shape):
+            print(f"Positions don't match the player sequence and board shape of '{path}'")
+            return False
+        with open(path, "ab") as f:
+            records.tofile(f)
+        return True
+
+    header = PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, shape[0], shape[1], player_order.encode())
+    with open(path, "wb") as f:
+        f.write(header.ljust(PACKED_HEADER_SIZE, b"\0"))
+        records.tofile(f)
+    return True
+
+
+def read_packed_header(path: str) -> Optional[Tuple[str, Tuple[int, int]]]:
+    """
+    Read the header of a packed position file
+    :param path: The path to the file
+    :return: The player sequence and the board shape, or ``None`` if the file is invalid
+    """
+    with open(path, "rb") as f:
+        data = f.read(PACKED_HEADER_SIZE)
+    if len(data) < PACKED_HEADER_SIZE:
+        print(f"'{path}' is not a packed position file")
+        return None
+
+    magic, version, height, width, player_order = PACKED_HEADER.unpack_from(data)
+    if magic != PACKED_MAGIC:
+        print(f"'{path}' is not a packed position file")
+        return None
+    if version != PACKED_VERSION:
+        print(f"Unsupported packed format version {version}")
+        return None
+    return player_order.rstrip(b"\0").decode(), (height, width)
+
+
+class PackedPositions:
+    """
+    Memory-mapped packed position file (.pbrd)
+
+    No position is parsed when opening the file: ``codes`` and ``turns`` are views of the file,
+    which can be sliced or fed to NumPy directly, e.g. ``positions.codes[1000:2000]``
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        header = read_packed_header(path)
+        if header is None:
+            raise ValueError(f"Invalid packed position file '{path}'")
+        self.player_order, self.shape = header
+
+        dtype = packed_dtype(self.shape)
+        count = (os.path.getsize(path) - PACKED_HEADER_SIZE) // dtype.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype=dtype, mode="r", offset=PACKED_HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.empty(0, dtype=dtype)
+
+    @property
+    def codes(self) -> np.ndarray:
+        """Board codes of every position, of shape (count, height, width)"""
+        return self.records["codes"]
+
+    @property
+    def turns(self) -> np.ndarray:
+        """Index of the next player in the sequence, for every position"""
+        return self.records["turn"]
+
+    def __len__(self) -> int:
+        """Number of positions in the file"""
+        return len(self.records)
+
+    def name(self, index: int) -> str:
+        """
+        Get a description of a position for messages
+        :param index: Index of the position, starting at 0
+        :return: ``path:index``
+        """
+        return f"{self.path}:{index}"
+
+    def __getitem__(self, index: int) -> Tuple[str, np.ndarray]:
+        """
+        Decode a position
+        :param index: Index of the position, starting at 0
+        :return: The player sequence, starting with the next player, and the board
+        """
+        record = self.records[index]
+        return rotate_sequence(self.player_order, int(record["turn"])), BoardCodes.decode(record["codes"])
+
+
+def write_positions(path: str, positions: List[Tuple[str, np.ndarray]]) -> bool:
+    """
+    Write positions in a file, in the format given by its extension
+
+    A .brd file only holds a single position. Positions written in a .pbrd file must all have
+    the same players and board shape (see :func:`align_position`)
+    :param path: The path to the file
+    :param positions: A list of (player sequence, board)
+    :return: ``True`` if successful, ``False`` otherwise
+    """
+    ext = os.path.splitext(path)[1]
+    if len(positions) == 0:
+        print("No position to write")
+        return False
+
+    if ext == ".brd":
+        if len(positions) > 1:
+            print("A .brd file can only contain a single position")
+            return False
+        with open(path, "w") as f:
+            f.write(format_brd(*positions[0]))
+        return True
+
+    if ext in (".fen", ".epd"):
+        lines = []
+        for order, board in positions:
+            fen = format_fen(order, board)
+            if fen is None:
+                print("Only boards with a white and a black player can be described in FEN")
+                return False
+            lines.append(fen)
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return True
+
+    if ext == ".pbrd":
+        player_order = positions[0][0]
+        turns = []
+        boards = []
+        for order, board in positions:
+            aligned = align_position(player_order, order, board)
+            if aligned is None or aligned[1].shape != positions[0][1].shape:
+                print(f"Position with sequence {order} doesn't match the first position")
+                return False
+            turns.append(aligned[0])
+            boards.append(BoardCodes.encode(aligned[1]))
+        return write_packed(path, player_order, np.array(boards), turns)
+
+    print(f"Unsupported extension '{ext}'")
+    return False
+
+
+def read_positions(path: str) -> Iterator[Tuple[str, str, np.ndarray]]:
+    """
+    Read every position of a file
+
+    A .brd file contains a single position, .fen and .epd files one position per line
+    (see :class:`PositionFile`) and .pbrd files are memory-mapped (see :class:`PackedPositions`).
+    Invalid positions are reported and skipped
+    :param path: The path to the file
+    :return: An iterator of (name, player sequence, board), where name is ``path``,
+             ``path:line`` or ``path:index``
+    """
+    ext = os.path.splitext(path)[1]
+    if ext == ".brd":
+        with open(path, "r") as f:
+            parsed = parse_brd(f.read())
+        if parsed is not None:
+            yield (path, *parsed)
+        return
+
+    if ext == ".pbrd":
+        try:
+            packed = PackedPositions(path)
+        except ValueError:
+            return
+        for index in range(len(packed)):
+            yield (packed.name(index), *packed[index])
+        return
+
+    positions = PositionFile(path)
+    for index, line in positions:
+        parsed = parse_fen(line)
+        if parsed is None:
+            print(f"Skipping invalid position at {positions.name(index)}")
+            continue
+        yield (positions.name(index), *parsed)
@@ -0,0 +1,158 @@
+"""
+Precomputed geometry of a board
+
+A board may have any shape and holes (``XX`` tiles, which are not part of the board). Instead of checking
+bounds and holes for every step of every move, the squares reachable from each square are computed once
+per map and per orientation, and shared by the rules (:mod:`ChessRules`), the engine and the evaluator of Gambit:
+
+- ``valid``: mask of the squares which are part of the board
+- ``knight``/``king``: squares reachable by a knight/king from each square
+- ``rook_rays``/``bishop_rays``: lines of squares from each square, stopping before the edge or a hole
+- ``pawn_push``/``pawn_captures``/``promotion``: pawn moves and promotion squares, for each orientation
+
+An orientation is the number of quarter turns between the board of a player and this board
+(see :func:`player_orientations`): the pawns of orientation 0 move towards growing rows, like the pawns of the
+player the board is given to, and the pawns of orientation 2 towards decreasing rows.
+Squares are ``(row, column)`` tuples.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import BoardCodes
+
+Square = Tuple[int, int]
+
+ROOK_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+KNIGHT_OFFSETS = ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2))
+KING_OFFSETS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+
+# Geometries are shared by every board with the same shape and holes
+_geometries: Dict[tuple, "BoardGeometry"] = {}
+
+
+def forward_direction(orientation: int) -> Square:
+    """
+    Get the direction in which the pawns of an orientation move
+    :param orientation: Number of quarter turns between the board of the pawn's player and this board
+    :return: The step made by a pawn
+    """
+    dy, dx = 1, 0
+    # Same rotation as numpy.rot90, which builds the board of each player
+    for _ in range(-orientation % 4):
+        dy, dx = -dx, dy
+    return dy, dx
+
+
+def player_orientations(player_sequence: str) -> Dict[str, int]:
+    """
+    Get the orientation of every player, relative to the first player of a sequence
+    :param player_sequence: The sequence of the players (team, color, rotation), starting with the board's owner
+    :return: The orientation of each color
+    """
+    own_rot = int(player_sequence[2])
+    return {
+        player_sequence[i + 1]: (int(player_sequence[i + 2]) - own_rot) % 4
+        for i in range(0, len(player_sequence), 3)
+    }
+
+
+class BoardGeometry:
+    """Move tables of a board, built once per shape and holes (use :meth:`of`)"""
+
+    def __init__(self, valid: np.ndarray):
+        """
+        :param valid: Boolean mask of the squares which are part of the board
+        """
+        self.valid: np.ndarray = np.array(valid, dtype=bool)
+        self.valid.flags.writeable = False
+        self.shape: Tuple[int, int] = self.valid.shape
+        self.squares: List[Square] = [(int(y), int(x)) for y, x in zip(*np.nonzero(self.valid))]
+
+        self.knight: Dict[Square, Tuple[Square, ...]] = {
+            square: self._jumps(square, KNIGHT_OFFSETS) for square in self.squares
+        }
+        self.king: Dict[Square, Tuple[Square, ...]] = {
+            square: self._jumps(square, KING_OFFSETS) for square in self.squares
+        }
+        self.rook_rays: Dict[Square, Tuple[Tuple[Square, ...], ...]] = {
+            square: self._rays(square, ROOK_DIRECTIONS) for square in self.squares
+        }
+        self.bishop_rays: Dict[Square, Tuple[Tuple[Square, ...], ...]] = {
+            square: self._rays(square, BISHOP_DIRECTIONS) for square in self.squares
+        }
+
+        self.pawn_push: List[Dict[Square, Optional[Square]]] = []
+        self.pawn_captures: List[Dict[Square, Tuple[Square, ...]]] = []
+        self.promotion: List[frozenset] = []
+        height, width = self.shape
+        for orientation in range(4):
+            dy, dx = forward_direction(orientation)
+            push = {}
+            captures = {}
+            for y, x in self.squares:
+                forward = (y + dy, x + dx)
+                push[(y, x)] = forward if self.is_valid(forward) else None
+                # The capture squares are on both sides of the square in front of the pawn
+                captures[(y, x)] = tuple(
+                    target for target in ((y + dy + dx, x + dx + dy), (y + dy - dx, x + dx - dy))
+                    if self.is_valid(target)
+                )
+            self.pawn_push.append(push)
+            self.pawn_captures.append(captures)
+            # Pawns are promoted on the last rank of the board in their direction, like in the arena
+            self.promotion.append(frozenset(
+                (y, x) for y, x in self.squares
+                if not (0 <= y + dy < height and 0 <= x + dx < width)
+            ))
+
+    @classmethod
+    def of(cls, board: np.ndarray) -> "BoardGeometry":
+        """
+        Get the geometry of a board, computed on the first call for its shape and holes
+        :param board: A string board (holes are ``XX``) or a code board (holes are ``BoardCodes.HOLE``)
+        :return: The shared geometry
+        """
+        if board.dtype == np.uint8:
+            valid = board != BoardCodes.HOLE
+        else:
+            valid = board != 'XX'
+        key = (valid.shape, np.packbits(valid).tobytes())
+        geometry = _geometries.get(key)
+        if geometry is None:
+            geometry = _geometries[key] = cls(valid)
+        return geometry
+
+    def is_valid(self, square: Square) -> bool:
+        """
+        :return: ``True`` if the square is inside the board and isn't a hole
+        """
+        y, x = square
+        return 0 <= y < self.shape[0] and 0 <= x < self.shape[1] and bool(self.valid[y, x])
+
+    def rays(self, square: Square) -> Tuple[Tuple[Square, ...], ...]:
+        """
+        :return: The rook and bishop rays of a square, for queens
+        """
+        return self.rook_rays[square] + self.bishop_rays[square]
+
+    def _jumps(self, square: Square, offsets) -> Tuple[Square, ...]:
+        y, x = square
+        return tuple(
+            (y + dy, x + dx) for dy, dx in offsets if self.is_valid((y + dy, x + dx))
+        )
+
+    def _rays(self, square: Square, directions) -> Tuple[Tuple[Square, ...], ...]:
+        rays = []
+        for dy, dx in directions:
+            ray = []
+            y, x = square[0] + dy, square[1] + dx
+            while self.is_valid((y, x)):
+                ray.append((y, x))
+                y += dy
+                x += dx
+            if ray:
+                rays.append(tuple(ray))
+        return tuple(rays)
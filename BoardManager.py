@@ -1,66 +1,92 @@
 import os
-import re
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 
-from PieceManager import PieceManager
+import BoardCodes
+import BoardFormats
+from ChessRules import rotate_coordinates
 
 
 class BoardManager:
+    """
+    Model of the board, independent of the GUI
+
+    The board is kept as a matrix of tile descriptions (``""`` for an empty tile, ``"XX"`` for a hole,
+    e.g. ``"pw"`` for a white pawn), mirrored in a compact code array (see :mod:`BoardCodes`).
+    The graphics items of the pieces are managed by the view (see :meth:`ChessArena.ChessArena.setup_board`),
+    so this class can be used without a ``QApplication``
+    """
+
     BOARD_DIRECTORY = os.path.join(os.path.abspath(os.path.dirname(__file__)), "Data", "maps")
     DEFAULT_BOARD = os.path.join(BOARD_DIRECTORY, "default.brd")
 
     def __init__(self):
         self.board: np.array = np.array([], dtype='O')
+        self.codes: np.ndarray = np.array([], dtype=np.uint8)
         self.path: Optional[str] = None
+        # Index of the loaded position in a multi-position file
+        self.position_index: int = 0
+        self.position_file: Optional[Union[BoardFormats.PositionFile, BoardFormats.PackedPositions]] = None
+        self.position_file_mtime: float = 0
         self.player_order: str = "0w01b2"
         self.available_colors: list[str] = []
-        self.pieces = []
+        # FEN fields which are not described by the board (see get_fen)
+        self.castling: str = "-"
+        self.en_passant: str = "-"
+        self.halfmove: int = 0
+        self.fullmove: int = 1
+        # King and rook coordinates of each castling right, on the real board
+        self.castling_squares: Dict[str, Tuple[Tuple[int, int], Tuple[int, int]]] = {}
         self.load_file(self.DEFAULT_BOARD)
 
-    @staticmethod
-    def get_string_board(board):
-        res = []
-        for r in board:
-            line = []
-            for c in r:
-                if type(c) is str:
-                    line.append(c)
-                else:
-                    line.append(c.string())
-            res.append(line)
-        return res
-
     def post_load(self):
         """
         Callback called after loading a board
 
-        Builds a list of available player colors used on the board
+        Builds a list of available player colors used on the board,
+        and the compact code array mirroring the board (see :mod:`BoardCodes`)
         """
-
-        new_board = np.empty_like(self.board, dtype=object)
-        self.pieces = []
-
+        self.board = np.array(self.board, dtype=object)
         self.available_colors = []
-        for y in range(self.board.shape[0]):
-            for x in range(self.board.shape[1]):
-                if self.board[y, x] in ("", "XX"):
-                    new_board[y, x] = self.board[y, x]
-                    continue
-
-                piece_type, color = self.board[y, x]
-                if color not in self.available_colors:
-                    self.available_colors.append(color)
+        for tile in self.board.flat:
+            if tile in ("", "XX"):
+                continue
+            color = tile[1]
+            if color not in self.available_colors:
+                self.available_colors.append(color)
 
-                piece = PieceManager.get_piece(color, piece_type)
-                new_board[y, x] = piece
-                
-                self.pieces.append(piece)
+        self.codes = BoardCodes.encode(self.board)
 
-        self.board = new_board
-
-    def load_file(self, path: str) -> bool:
+    def get_position_file(self, path: str) -> Union[BoardFormats.PositionFile, BoardFormats.PackedPositions]:
+        """
+        Get the index of a multi-position file, built once per file version
+        :param path: The path to a .fen, .epd or .pbrd file
+        :return: The indexed or memory-mapped file
+        """
+        mtime = os.path.getmtime(path)
+        if self.position_file is None or self.position_file.path != path or self.position_file_mtime != mtime:
+            self.position_file_mtime = mtime
+            if os.path.splitext(path)[1] == ".pbrd":
+                self.position_file = BoardFormats.PackedPositions(path)
+            else:
+                self.position_file = BoardFormats.PositionFile(path)
+        return self.position_file
+
+    def get_position_count(self, path: str) -> int:
+        """
+        Get the number of positions in a file
+        :param path: The path to the board file
+        :return: The number of positions, 1 for a .brd file
+        """
+        if os.path.splitext(path)[1] in (".fen", ".epd", ".pbrd"):
+            try:
+                return len(self.get_position_file(path))
+            except ValueError:
+                return 0
+        return 1
+
+    def load_file(self, path: str, index: int = 0) -> bool:
         """
         Load a board from a file
 
@@ -98,15 +124,45 @@ class BoardManager:
         FEN (.fen)
         ----------
 
-        Only contains a single line describing the board layout in `FEN`_
+        Contains one line per position describing the board layout in `FEN`_
 
         *Example*::
 
             rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1
 
+        Every field is kept: castling rights (also in X-FEN, e.g. ``HAha``), en passant target
+        and move clocks. Boards can be wider than 9 tiles (e.g. ``r10k/12``), and holes are written ``*``.
+
         .. _FEN: https://en.wikipedia.org/wiki/Forsyth%E2%80%93Edwards_Notation
 
-        :param path: The path to the board file. Can either be a .brd or .fen file
+        ----------
+        EPD (.epd)
+        ----------
+
+        One position per line in `EPD`_, i.e. FEN followed by operations such as the best move.
+        The operations are ignored when loading a board
+
+        *Example*::
+
+            rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - bm e5; id "open 1";
+
+        .. _EPD: https://www.chessprogramming.org/Extended_Position_Description
+
+        Files with several positions are indexed once (see :class:`BoardFormats.PositionFile`),
+        so any position is loaded without reading the rest of the file.
+
+        ----------------------
+        Packed boards (.pbrd)
+        ----------------------
+
+        Binary file holding any number of positions with the same players and board shape:
+        a header with the board shape and the player sequence, then one fixed-size record
+        per position, with the index of the next player and the ``uint8`` tile codes (see :mod:`BoardCodes`).
+        The file is memory-mapped (see :class:`BoardFormats.PackedPositions`), so large boards
+        and datasets are sliced without any parsing.
+
+        :param path: The path to the board file. Can either be a .brd, .fen, .epd or .pbrd file
+        :param index: Index of the position to load in a .fen, .epd or .pbrd file
         :return: ``True`` if successful, `False` otherwise
         """
         if path.strip() == "":
@@ -122,148 +178,155 @@ class BoardManager:
 
         ext = os.path.splitext(path)[1]
 
-        if ext not in (".brd", ".fen"):
+        if ext not in (".brd", ".fen", ".epd", ".pbrd"):
             print(f"Unsupported extension '{ext}'")
             return False
 
-        with open(path, "r") as f:
-            data = f.read()
-
+        fen: Optional[BoardFormats.FenPosition] = None
         if ext == ".brd":
-            lines = data.split("\n")
-            rows = [
-                line.replace('--', '').strip().split(",")
-                for line in lines[1:]
-            ]
-            rows = list(filter(lambda r: len(r) != 0, rows))
-            if len(rows) == 0:
-                print("Board must have at least one row")
+            with open(path, "r") as f:
+                parsed = BoardFormats.parse_brd(f.read())
+        else:
+            try:
+                positions = self.get_position_file(path)
+            except ValueError:
+                return False
+            if not 0 <= index < len(positions):
+                print(f"Position {index} out of range, '{path}' contains {len(positions)} position(s)")
                 return False
+            if ext == ".pbrd":
+                parsed = positions[index]
+            else:
+                fen = positions.position(index)
+                parsed = None if fen is None else BoardFormats.position_to_board(fen)
+        if parsed is None:
+            return False
 
-            width = len(rows[0])
+        self.player_order, self.board = parsed
+        self.path = path
+        self.position_index = index
+        self.post_load()
+        self.set_fen_fields(fen)
+        return True
 
-            #   check lines length equals
-            for row in rows:
-                if len(row) != width:
-                    print("All rows must have the same width")
-                    return False
+    def reload(self):
+        """Reload the board from the last imported file, if any"""
+        if self.path is not None:
+            self.load_file(self.path, self.position_index)
 
-            self.player_order = lines[0]
-            self.board = np.array(rows, dtype='O')
-            self.path = path
-            self.post_load()
-            return True
+    def set_fen_fields(self, fen: Optional[BoardFormats.FenPosition]):
+        """
+        Set the FEN fields which are not described by the board
+        :param fen: The loaded FEN position, or ``None`` to use the default values
+        """
+        if fen is None:
+            fen = BoardFormats.FenPosition(self.board)
+        self.castling = fen.castling
+        self.en_passant = fen.en_passant
+        self.halfmove = fen.halfmove
+        self.fullmove = fen.fullmove
+
+        self.castling_squares = {}
+        if self.castling == "-":
+            return
+        # The FEN board is black's view of the board
+        black_rotation = int(self.player_order[self.player_order.index("b") + 1])
+        for right, squares in BoardFormats.castling_squares(fen).items():
+            self.castling_squares[right] = tuple(
+                rotate_coordinates(fen.board.shape, square, black_rotation) for square in squares
+            )
+
+    def play_fen_fields(self, start: Tuple[int, int], end: Tuple[int, int], piece: str,
+                        captured: Optional[str]) -> tuple:
+        """
+        Update the FEN fields after a move
+
+        The rules have neither castling nor double pawn steps, so a castling right is lost as soon as
+        its king or rook moves or is captured, and there is no en passant target after a move
+        :param start: Start coordinates of the move on the real board
+        :param end: End coordinates of the move on the real board
+        :param piece: The moved piece
+        :param captured: The captured piece, if any
+        :return: The previous fields, to restore them with :meth:`restore_fen_fields`
+        """
+        previous = (self.castling, self.en_passant, self.halfmove, self.fullmove, self.castling_squares)
+        self.halfmove = 0 if piece[0] == "p" or captured is not None else self.halfmove + 1
+        if piece[1] == "b":
+            self.fullmove += 1
+        self.en_passant = "-"
+
+        lost = [right for right, squares in self.castling_squares.items() if start in squares or end in squares]
+        if lost:
+            self.castling_squares = {
+                right: squares for right, squares in self.castling_squares.items() if right not in lost
+            }
+            self.castling = "".join(right for right in self.castling if right not in lost) or "-"
+        return previous
+
+    def restore_fen_fields(self, fields: tuple):
+        """
+        Restore the FEN fields after a move was reverted
+        :param fields: The fields returned by :meth:`play_fen_fields`
+        """
+        self.castling, self.en_passant, self.halfmove, self.fullmove, self.castling_squares = fields
 
-        elif ext == ".fen":
-            parts = data.strip().split(" ")
-            if len(parts) == 0:
-                print("FEN must at least contain the board state")
-                return False
+    def get_fen(self, turn: int = 0) -> Optional[str]:
+        """
+        Get the current board position as a FEN string
+        :param turn: Index of the next player in the sequence
+        :return: The FEN line, or ``None`` if the board doesn't have exactly a white and a black player
+        """
+        return BoardFormats.format_fen(
+            BoardFormats.rotate_sequence(self.player_order, turn),
+            self.board,
+            self.castling,
+            self.en_passant,
+            self.halfmove,
+            self.fullmove,
+        )
+
+    def get_rows(self) -> List[str]:
+        """
+        Get the current board position as .brd rows
 
-            board_desc = parts[0]
-            rows_desc = board_desc.split("/")
-            if len(rows_desc) == 0:
-                print("Board must have at least one row")
-                return False
+        :return: One line of comma-separated tile descriptions per row
+        """
+        return [
+            ",".join(tile if tile != "" else "--" for tile in row)
+            for row in self.board
+        ]
 
-            rows = []
-
-            # Match before a letter or between a letter and a digit, or at the start/end of the string
-            # (allows for bigger board with spaces >= 10)
-            regexp = r"^|(?=\D)|(?<=\D)(?=\d)|$"
-            for row_desc in rows_desc:
-                matches = list(re.finditer(regexp, row_desc))
-                row = []
-                for i in range(len(matches) - 1):
-                    m1 = matches[i]
-                    m2 = matches[i + 1]
-                    part = row_desc[m1.start():m2.start()]
-                    if part.isnumeric():
-                        row += [""] * int(part)
-                    else:
-                        color = "w" if part.isupper() else "b"
-                        piece = part.lower()
-                        if piece not in ("p", "r", "n", "b", "k", "q"):
-                            print(f"Invalid piece '{part}'")
-                            return False
-                        row.append(piece + color)
-                rows.append(row)
-
-            width = len(rows[0])
-            # Check lines length equals
-            for row in rows:
-                if len(row) != width:
-                    print("All rows must have the same width")
-                    return False
-
-            next_player = parts[1] if len(parts) > 1 else "w"
-            if next_player not in ("w", "b"):
-                print(f"Invalid player '{next_player}'")
-                return False
+    def save(self, path: str) -> bool:
+        """
+        Save the current board position in a file, in the format given by its extension
 
-            self.player_order = "0w01b2" if next_player == "w" else "0b01w2"
-            board = np.array(rows, dtype='O')
-            if next_player == "w":
-                board = np.rot90(board, 2)
-            self.board = board
-            self.path = path
-            self.post_load()
+        :param path: The path where to save the board. Can either be a .brd, .fen or .pbrd file
+        :return: ``True`` if successful, ``False`` otherwise
+        """
+        if os.path.splitext(path)[1] in (".fen", ".epd"):
+            fen = self.get_fen()
+            if fen is None:
+                print("Only boards with a white and a black player can be described in FEN")
+                return False
+            with open(path, "w") as f:
+                f.write(fen + "\n")
             return True
-        return False
+        return BoardFormats.write_positions(path, [(self.player_order, self.board)])
 
-    def reload(self):
-        """Reload the board from the last imported file, if any"""
-        if self.path is not None:
-            self.load_file(self.path)
-
-    def get_fen(self):
-        """Get the current board position as a FEN string"""
-        fen = ""
-        rows = []
-        for y in range(self.board.shape[0]):
-            row = ""
-            count = 0
-            for x in range(self.board.shape[1]):
-                piece = self.board[y, x]
-                if piece == "":
-                    count += 1
-                else:
-                    if count != 0:
-                        row += str(count)
-                        count = 0
-
-                    type_ = piece.type
-                    col = piece.color
-
-                    if col == "w":
-                        type_ = type_.upper()
-                    row += type_
-
-            if count != 0:
-                row += str(count)
-            rows.append(row)
-
-        fen += "/".join(rows)
-        fen += " " + self.player_order[1]
-        fen += " - - 0 1"
-        return fen
-
-    def save(self, path: str):
+    @staticmethod
+    def convert(source: str, destination: str) -> bool:
         """
-        Save the current board position in a file
+        Convert a board file to another format, e.g. a .fen file with many positions to a .pbrd file
+
+        The formats are given by the file extensions (see :meth:`load_file`).
+        Invalid positions of the source are skipped
 
-        :param path: The path where to save the board
+        :param source: The path to the file to convert
+        :param destination: The path of the converted file
+        :return: ``True`` if successful, ``False`` otherwise
         """
-        with open(path, "w") as file:
-            file.write(self.player_order)
-            for y in range(self.board.shape[0]):
-                line = []
-                for x in range(self.board.shape[1]):
-                    piece = self.board[y, x]
-                    if piece == "":
-                        line.append("--")
-                        continue;
-
-                    line.append(piece.string())
-
-                file.write("\n" + ",".join(line))
+        if not os.path.isfile(source):
+            print(f"File '{source}' not found")
+            return False
+        positions = [(order, board) for _, order, board in BoardFormats.read_positions(source)]
+        return BoardFormats.write_positions(destination, positions)
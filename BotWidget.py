@@ -1,4 +1,3 @@
-from PyQt6 import uic
 from PyQt6.QtGui import QPalette
 from PyQt6.QtWidgets import QWidget
 
@@ -10,7 +9,7 @@ class BotWidget(Ui_Form, QWidget):
     def __init__(self, color: str, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        uic.loadUi("Data/bot_widget.ui", self)
+        self.setupUi(self)
         self.colorName.setText(PieceManager.COLOR_NAMES[color])
         palette = self.colorSwatch.palette()
         palette.setBrush(QPalette.ColorRole.Window, PieceManager.COLORS[color][0])
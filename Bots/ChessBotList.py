@@ -1,9 +1,177 @@
+import importlib
+import json
+import os
 
 CHESS_BOT_LIST = {}
 
-def register_chess_bot(name, function):
+#   Module of every available bot, read from the manifest by discover_bots
+BOT_MODULES = {}
+
+BOTS_DIRECTORY = os.path.abspath(os.path.dirname(__file__))
+BOT_MANIFEST = os.path.join(os.path.dirname(BOTS_DIRECTORY), "Data", "cache", "bots.json")
+
+
+class ChessBot:
+    """
+    Base class for stateful bots
+
+    A new instance is created for each player at the start of a game and kept until the game ends,
+    so caches (transposition table, precomputed tables, ...) can persist and be updated between turns.
+
+    Boards and moves are always given in the player's own orientation, like for function bots.
+    """
+
+    #   If True, boards are given as read-only uint8 arrays of piece codes (see BoardCodes.py)
+    compact_board = False
+
+    #   Statistics about the last turn (depth, nodes, score, ...), saved in the game log.
+    #   Each session has its own dict, set in __init__ and reset at the start of every game
+    stats: dict
+
+    def __init__(self):
+        self.stats = {}
+
+    def on_game_start(self, board, player_sequence):
+        """
+        Called once before the first turn of a game
+        :param board: The initial board
+        :param player_sequence: The player sequence of this bot, e.g. ``"0w0"``
+        """
+        self.player_sequence = player_sequence
+        self.stats = {}
+
+    def on_move(self, move):
+        """
+        Called after every move played by any player
+        :param move: The move played, as ``((xs, ys), (xd, yd))``
+        """
+        pass
+
+    def on_undo(self, move):
+        """
+        Called when the last move is undone
+        :param move: The move undone, as ``((xs, ys), (xd, yd))``
+        """
+        pass
+
+    def choose_move(self, board, budget, **kwargs):
+        """
+        Called when it is this bot's turn to play
+        :param board: The current board
+        :param budget: Time budget allowed for this turn, in seconds
+        :return: The move to play, as ``((xs, ys), (xd, yd))``
+        """
+        raise NotImplementedError
+
+    def on_game_end(self, result):
+        """
+        Called once when the game ends
+        :param result: The winner's color, or ``None`` if the game was interrupted
+        """
+        pass
+
+
+class FunctionBot(ChessBot):
+    """Session wrapping a bot function, so that function bots and class bots are run the same way"""
+
+    def __init__(self, function):
+        super().__init__()
+        self.function = function
+        self.compact_board = getattr(function, "compact_board", False)
+
+    def choose_move(self, board, budget, **kwargs):
+        return self.function(self.player_sequence, board, budget, **kwargs)
+
+
+def create_session(bot) -> ChessBot:
+    """
+    Create a new game session for a registered bot
+    :param bot: A bot function or a ChessBot subclass
+    :return: The session, ready for on_game_start
+    """
+    if isinstance(bot, type) and issubclass(bot, ChessBot):
+        return bot()
+    return FunctionBot(bot)
+
+
+#   Bots can either be functions called once per turn, or ChessBot subclasses instantiated once per game
+#   Bots registered with compact=True receive the board as a read-only uint8 array of piece codes
+#   (see BoardCodes.py) instead of a matrix of strings, which avoids any conversion work per turn
+def register_chess_bot(name, function, compact=None):
     global CHESS_BOT_LIST
     if name in CHESS_BOT_LIST:
-        register_chess_bot(name+"_", function)
+        register_chess_bot(name+"_", function, compact)
     else:
-        CHESS_BOT_LIST[name] = function
\ No newline at end of file
+        if compact is not None:
+            function.compact_board = compact
+        CHESS_BOT_LIST[name] = function
+
+
+def _import_bot_module(module):
+    """
+    Import a bot module
+    :param module: The module name, in the Bots package
+    :return: The names of the bots it registered
+    """
+    before = set(CHESS_BOT_LIST)
+    try:
+        importlib.import_module(f"Bots.{module}")
+    except Exception as e:
+        print(f"Could not import bot module '{module}': {e}")
+    return [name for name in CHESS_BOT_LIST if name not in before]
+
+
+def discover_bots():
+    """
+    List the available bots without importing them
+
+    The bots registered by each module of the Bots folder are saved in a manifest with the module's
+    modification time. Only new or modified modules are imported to update it
+    :return: The module of each bot, by bot name
+    """
+    try:
+        with open(BOT_MANIFEST, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    modules = sorted(
+        f[:-3] for f in os.listdir(BOTS_DIRECTORY)
+        if f.endswith(".py") and f not in ("__init__.py", "ChessBotList.py")
+    )
+
+    entries = {}
+    for module in modules:
+        mtime = os.path.getmtime(os.path.join(BOTS_DIRECTORY, module + ".py"))
+        entry = manifest.get(module)
+        if entry is None or entry["mtime"] != mtime:
+            entry = {"mtime": mtime, "bots": _import_bot_module(module)}
+        entries[module] = entry
+
+    if entries != manifest:
+        try:
+            os.makedirs(os.path.dirname(BOT_MANIFEST), exist_ok=True)
+            with open(BOT_MANIFEST, "w") as f:
+                json.dump(entries, f, indent=1)
+        except OSError as e:
+            print(f"Could not write the bot manifest '{BOT_MANIFEST}': {e}")
+
+    BOT_MODULES.clear()
+    for module, entry in entries.items():
+        for name in entry["bots"]:
+            BOT_MODULES[name] = module
+    return BOT_MODULES
+
+
+def load_bot(name):
+    """
+    Get a bot, importing its module the first time it is used
+    :param name: The bot name
+    :return: The bot function or class, or ``None`` if there is no such bot
+    """
+    if name not in CHESS_BOT_LIST:
+        if not BOT_MODULES:
+            discover_bots()
+        if name in BOT_MODULES:
+            _import_bot_module(BOT_MODULES[name])
+    return CHESS_BOT_LIST.get(name)
\ No newline at end of file
@@ -9,59 +9,172 @@
 
 #   Be careful with modules to import from the root (don't forget the Bots.)
 import time
-from Bots.ChessBotList import register_chess_bot
-from Bots.Gambit_utils import alpha_beta, generate_moves, do_move, opposite
+from BoardGeometry import BoardGeometry, player_orientations
+from Bots.ChessBotList import ChessBot, register_chess_bot
+from Bots.Gambit_time import TimeManager, game_phase, phase_material
+from Bots.Gambit_utils import alpha_beta, generate_moves, do_move, opposite, principal_variation
 
 # Gambit chess bot implementation
+class GambitBot(ChessBot):
+    """Gambit session: the transposition table is kept for the whole game instead of being rebuilt every turn"""
+
+    # Number of entries above which the transposition table is cleared
+    MAX_TABLE_SIZE = 1_000_000
+
+    def on_game_start(self, board, player_sequence):
+        super().on_game_start(board, player_sequence)
+        self.transposition_table = {}
+        self.initial_material = phase_material(board)
+
+    def choose_move(self, board, budget, **kwargs):
+
+        # With a game clock, budget is the remaining time for the whole game.
+        # The search can also be limited with max_depth and max_nodes (used for analysis)
+        time_manager = TimeManager(
+            budget,
+            clock=kwargs.get("clock", False),
+            increment=kwargs.get("increment", 0.0),
+            phase=game_phase(board, self.initial_material),
+        )
+        stop_time = time_manager.stop_time
+
+        color = self.player_sequence[1]
+
+        if len(self.transposition_table) > self.MAX_TABLE_SIZE:
+            self.transposition_table.clear()
+        transposition_table = self.transposition_table
+
+        geometry = BoardGeometry.of(board)
+        # Bots are only given their own player sequence: the opponent is assumed to face the bot
+        orientations = {opposite(color): 2}
+        orientations.update(player_orientations(self.player_sequence))
+        possible_moves = generate_moves(board, color, geometry)
+
+        # No possible moves
+        if not possible_moves:
+            return (0,0), (0,0)
+
+        best_move = possible_moves[0]
+        best_score = None
+
+        # Multi-PV: the best `multipv` root moves are searched, each one by a re-search of the root
+        # without the moves already found. The re-searches share the transposition table
+        multipv = kwargs.get("multipv")
+        line_count = min(max(1, int(multipv or 1)), len(possible_moves))
+        # Best moves, scores and search depths of the last completed iteration
+        lines = []
+        # Last value of every root move, used to order the moves of the next search
+        root_values = {}
+
+        search_depth = 1
+        max_search_depth = kwargs.get("max_depth") or 20
+
+        search_stats = {'nodes': 0, 'max_nodes': kwargs.get("max_nodes") or float('inf')}
+        previous_nodes = 0
+        effective_branching = None
+        partial = False
+
+        try:
+            while search_depth <= max_search_depth:
+
+                # We prioritize the previous best moves, then the moves with the best previous values
+                ranks = {move: i for i, (move, _, _) in enumerate(lines)}
+                possible_moves.sort(key=lambda m: (ranks.get(m, len(ranks)), -root_values.get(m, float('-inf'))))
+
+                iteration_lines = []
+                excluded = set()
+                iteration_start = time.time()
+                iteration_nodes = search_stats['nodes']
+
+                while len(iteration_lines) < line_count:
+                    current_best_move = None
+                    best_value = float('-inf')
+
+                    for move in possible_moves:
+                        if move in excluded:
+                            continue
+                        if time.time() >= stop_time:
+                            raise TimeoutError("Search time exceeded")
+
+                        new_board = do_move(board, move, geometry)
+                        # Moves which can't beat the best one only need a bound (alpha = best value)
+                        move_value = alpha_beta(new_board, opposite(color), search_depth-1, best_value, float('inf'), False, stop_time, transposition_table, search_stats,
+                                                geometry, orientations)
+                        root_values[move] = move_value
+
+                        if move_value > best_value or current_best_move is None:
+                            best_value = move_value
+                            current_best_move = move
+
+                    iteration_lines.append((current_best_move, best_value, search_depth))
+                    excluded.add(current_best_move)
+
+                lines = iteration_lines
+                best_move, best_score, _ = lines[0]
+                search_depth += 1
+
+                time_manager.update(best_move)
+                if time_manager.should_stop():
+                    break
+
+                # Predict the next iteration's time from this one's and the effective branching factor,
+                # and don't start it if it cannot finish before the hard limit
+                iteration_time = time.time() - iteration_start
+                iteration_nodes = search_stats['nodes'] - iteration_nodes
+                if previous_nodes > 0:
+                    effective_branching = max(1.0, iteration_nodes / previous_nodes)
+                previous_nodes = iteration_nodes
+                if effective_branching is not None and not time_manager.can_finish(iteration_time * effective_branching):
+                    break
+
+        except TimeoutError:
+            # The previous best move is searched first, so any root move fully searched
+            # in the interrupted iteration is at least as good at this depth
+            if iteration_lines:
+                best_move, best_score, _ = iteration_lines[0]
+                partial = True
+            elif current_best_move is not None:
+                best_move = current_best_move
+                best_score = best_value
+                partial = True
+            # Lines completed in the interrupted iteration replace the lines of the previous one,
+            # and the best move always comes first with the score it is returned with
+            found = {move for move, _, _ in iteration_lines} | {best_move}
+            lines = (iteration_lines + [line for line in lines if line[0] not in found])
+            if not iteration_lines:
+                lines.insert(0, (best_move, best_score, search_depth if partial else search_depth - 1))
+            lines = lines[:line_count]
+            print("Search limit reached, returning best move found so far.")
+
+        # Depth of the returned move: the interrupted depth if it comes from a partial iteration
+        self.stats = {
+            "depth": search_depth if partial else search_depth - 1,
+            "partial": partial,
+            "score": best_score,
+            "nodes": search_stats['nodes'],
+            "ebf": effective_branching,
+        }
+        if multipv is not None:
+            # Principal variations of the lines, read from the transposition table
+            self.stats["lines"] = [
+                {
+                    "move": move,
+                    "score": score,
+                    "depth": depth,
+                    "pv": [move] + principal_variation(do_move(board, move, geometry), opposite(color), max(0, depth - 1),
+                                                       transposition_table, geometry, orientations),
+                }
+                for move, score, depth in lines
+            ]
+        return best_move
+
+
+# Single turn entry point, for callers that don't keep a session
 def Gambit_chess_bot(player_sequence, board, time_budget, **kwargs):
-
-    start_time = time.time()
-    stop_time = start_time + time_budget - 0.1
-
-    color = player_sequence[1]
-
-    transposition_table = {}
-
-    possible_moves = generate_moves(board, color)
-
-    # No possible moves
-    if not possible_moves:
-        return (0,0), (0,0)
-
-    best_move = possible_moves[0]
-
-    search_depth = 1
-    max_search_depth = 20
-
-    try:
-        while search_depth <= max_search_depth:
-
-            if best_move in possible_moves:
-                # We prioritize the previously best move
-                possible_moves.sort(key=lambda m: m == best_move, reverse=True)
-
-            current_best_move = None
-            best_value = float('-inf')
-
-            for move in possible_moves:
-                if time.time() >= stop_time:
-                    raise TimeoutError("Search time exceeded")
-
-                new_board = do_move(board, move)
-                move_value = alpha_beta(new_board, opposite(color), search_depth-1, float('-inf'), float('inf'), False, stop_time, transposition_table)
-
-                if move_value > best_value:
-                    best_value = move_value
-                    current_best_move = move
-
-            best_move = current_best_move
-            search_depth += 1
-
-    except TimeoutError:
-        print("Search time exceeded, returning best move found so far.")
-
-    return best_move
+    bot = GambitBot()
+    bot.on_game_start(board, player_sequence)
+    return bot.choose_move(board, time_budget, **kwargs)
 
 
 # Register the Gambit chess bot
-register_chess_bot("Gambit", Gambit_chess_bot)
+register_chess_bot("Gambit", GambitBot)
@@ -0,0 +1,205 @@
+import json
+import os
+
+import numpy as np
+
+import BoardCodes
+from BoardGeometry import BoardGeometry
+
+# Parameterized evaluation of Gambit
+#
+#   The score of a position is the dot product of a feature vector and a weight vector:
+#       - material: number of own pieces minus number of opponent pieces, per piece type
+#       - piece-square tables: the same, per piece type and square bucket
+#   Squares are grouped in buckets by rank (distance from the player's side) and by distance
+#   from the central files, so the same weights work on every board shape.
+#   Scores are from the point of view of the given color, whose pieces move towards growing x
+#   (the orientation of the board given to the bot).
+#
+#   The weights are loaded at import from WEIGHTS_PATH, written by tune.py
+
+# Same order as BoardCodes.PIECES, so that piece codes map directly to weights
+PIECES = BoardCodes.PIECES
+PIECE_INDEX = {piece: i for i, piece in enumerate(PIECES)}
+RANK_BUCKETS = 4
+FILE_BUCKETS = 2
+SQUARE_BUCKETS = RANK_BUCKETS * FILE_BUCKETS
+FEATURE_COUNT = len(PIECES) * (1 + SQUARE_BUCKETS)
+
+WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Gambit_weights.json")
+
+DEFAULT_MATERIAL = {'k': 10000, 'q': 900, 'n': 320, 'b': 330, 'r': 500, 'p': 100}
+
+# Number of positions per block when building feature matrices, to bound the memory used
+FEATURE_BLOCK = 65536
+
+
+def material_feature(piece_index):
+    return piece_index
+
+
+def square_feature(piece_index, bucket):
+    return len(PIECES) + piece_index * SQUARE_BUCKETS + bucket
+
+
+def default_weights():
+    weights = np.zeros(FEATURE_COUNT, dtype=np.float64)
+    for piece, value in DEFAULT_MATERIAL.items():
+        weights[material_feature(PIECE_INDEX[piece])] = value
+    # Pawns are worth more as they get closer to promotion
+    for rank, bonus in enumerate((0, 10, 25, 50)):
+        for file in range(FILE_BUCKETS):
+            weights[square_feature(PIECE_INDEX['p'], rank * FILE_BUCKETS + file)] = bonus
+    return weights
+
+
+def load_weights(path=WEIGHTS_PATH):
+    """
+    Load a weight file written by save_weights
+    :param path: The path of the file
+    :return: The weight vector, or the default weights if the file is missing or invalid
+    """
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data["rank_buckets"] != RANK_BUCKETS or data["file_buckets"] != FILE_BUCKETS:
+            raise ValueError("the square buckets don't match")
+        weights = np.zeros(FEATURE_COUNT, dtype=np.float64)
+        for piece, i in PIECE_INDEX.items():
+            weights[material_feature(i)] = data["material"][piece]
+            table = np.asarray(data["pst"][piece], dtype=np.float64).reshape(SQUARE_BUCKETS)
+            weights[square_feature(i, 0):square_feature(i, SQUARE_BUCKETS)] = table
+        return weights
+    except FileNotFoundError:
+        return default_weights()
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Invalid Gambit weights '{path}' ({e}), using the default weights")
+        return default_weights()
+
+
+def save_weights(path, weights, info=None):
+    """
+    Save weights in a readable JSON file
+    :param path: The path of the file
+    :param weights: The weight vector
+    :param info: Additional information saved with the weights (tuning loss, number of positions, ...)
+    """
+    data = {
+        "rank_buckets": RANK_BUCKETS,
+        "file_buckets": FILE_BUCKETS,
+        "material": {piece: round(float(weights[material_feature(i)]), 2) for piece, i in PIECE_INDEX.items()},
+        "pst": {
+            piece: np.round(
+                weights[square_feature(i, 0):square_feature(i, SQUARE_BUCKETS)], 2
+            ).reshape(RANK_BUCKETS, FILE_BUCKETS).tolist()
+            for piece, i in PIECE_INDEX.items()
+        },
+        "info": info or {},
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=1)
+
+
+def square_buckets(height, width):
+    """
+    Get the bucket of every square, from the point of view of the player at the top of the board
+    :param height: Number of rows
+    :param width: Number of columns
+    :return: An int array of shape (height, width)
+    """
+    ranks = np.minimum(np.arange(height) * RANK_BUCKETS // height, RANK_BUCKETS - 1)
+    # 0 on the central files, growing towards the edges
+    distance = np.abs(2 * np.arange(width) - (width - 1)) / width
+    files = np.minimum((distance * FILE_BUCKETS).astype(int), FILE_BUCKETS - 1)
+    return ranks[:, None] * FILE_BUCKETS + files[None, :]
+
+
+def feature_matrix(codes, sides):
+    """
+    Build the features of many positions at once
+    :param codes: Code arrays of shape (count, height, width), in the orientation of the player to move
+    :param sides: Color index of the player to move (see BoardCodes.COLORS), for every position
+    :return: A float32 array of shape (count, FEATURE_COUNT)
+    """
+    codes = np.asarray(codes, dtype=np.uint8)
+    sides = np.asarray(sides)
+    count, height, width = codes.shape
+    buckets = square_buckets(height, width)
+    # Opponent pieces move the other way
+    mirrored = buckets[::-1, ::-1]
+
+    features = np.zeros((count, FEATURE_COUNT), dtype=np.float32)
+    for start in range(0, count, FEATURE_BLOCK):
+        block = codes[start:start + FEATURE_BLOCK]
+        occupied = (block != BoardCodes.EMPTY) & (block != BoardCodes.HOLE)
+        rows, y, x = np.nonzero(occupied)
+        tiles = block[rows, y, x]
+        types = (tiles & BoardCodes.TYPE_MASK).astype(np.int64) - 1
+        own = (tiles >> BoardCodes.COLOR_SHIFT) == sides[start + rows]
+        signs = np.where(own, 1.0, -1.0)
+        bucket = np.where(own, buckets[y, x], mirrored[y, x])
+
+        size = len(block) * FEATURE_COUNT
+        flat = np.bincount(rows * FEATURE_COUNT + material_feature(types), weights=signs, minlength=size)
+        flat += np.bincount(rows * FEATURE_COUNT + square_feature(types, bucket), weights=signs, minlength=size)
+        features[start:start + len(block)] = flat.reshape(len(block), FEATURE_COUNT)
+    return features
+
+
+WEIGHTS = load_weights()
+_value_tables = {}
+
+
+def set_weights(weights):
+    """
+    Replace the weights used by evaluate
+    :param weights: The weight vector
+    """
+    global WEIGHTS
+    WEIGHTS = np.asarray(weights, dtype=np.float64)
+    _value_tables.clear()
+
+
+def value_tables(height, width):
+    """
+    Get the value of every piece on every square for a board shape, computed once per shape
+    :return: The values of own pieces and of opponent pieces, as nested lists [piece][y][x]
+    """
+    key = (height, width)
+    if key not in _value_tables:
+        buckets = square_buckets(height, width)
+        mirrored = buckets[::-1, ::-1]
+        own = []
+        opponent = []
+        for i in range(len(PIECES)):
+            material = WEIGHTS[material_feature(i)]
+            table = WEIGHTS[square_feature(i, 0):square_feature(i, SQUARE_BUCKETS)]
+            own.append((material + table[buckets]).tolist())
+            opponent.append((material + table[mirrored]).tolist())
+        _value_tables[key] = (own, opponent)
+    return _value_tables[key]
+
+
+def evaluate(board, color, geometry=None):
+    """
+    Evaluate a position, with the same features as feature_matrix
+    :param board: The board as a string matrix, in the orientation of the given color
+    :param color: The color to evaluate the position for
+    :param geometry: The geometry of the board, to skip the holes (computed from the board if not given)
+    :return: The score, positive if the position is good for the color
+    """
+    if geometry is None:
+        geometry = BoardGeometry.of(board)
+    own, opponent = value_tables(*board.shape)
+    rows = board.tolist()
+    score = 0.0
+    for y, x in geometry.squares:
+        tile = rows[y][x]
+        if tile == '':
+            continue
+        i = PIECE_INDEX[tile[0]]
+        if tile[1] == color:
+            score += own[i][y][x]
+        else:
+            score -= opponent[i][y][x]
+    return score
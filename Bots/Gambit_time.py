@@ -0,0 +1,83 @@
+import time
+
+# Weight of each piece type in the game phase
+PHASE_WEIGHTS = {'p': 0, 'n': 1, 'b': 1, 'r': 2, 'q': 4, 'k': 0}
+
+
+def phase_material(board):
+    total = 0
+    for x in range(board.shape[0]):
+        for y in range(board.shape[1]):
+            piece = board[x, y]
+            if piece != '':
+                total += PHASE_WEIGHTS.get(piece[0], 0)
+    return total
+
+
+def game_phase(board, initial_material):
+    # 1.0 at the start of the game, 0.0 when only kings and pawns are left
+    if initial_material <= 0:
+        return 0.0
+    return min(1.0, phase_material(board) / initial_material)
+
+
+class TimeManager:
+    """
+    Time allocation for a single move
+
+    The search is aborted at the hard limit. The soft limit is only checked between
+    iterations of the iterative deepening: no new iteration starts after it.
+
+    With a game clock, the soft limit is a share of the remaining time scaled by the game phase,
+    and it shrinks when the best move stays the same across iterations or grows when it changes.
+    With a fixed budget per move, unused time is lost, so both limits use the whole budget.
+    """
+
+    # Never use more than this share of the remaining clock on a single move
+    MAX_CLOCK_SHARE = 0.4
+    # Soft limit multiplier, by number of iterations the best move has been stable for
+    STABILITY_SCALE = (1.5, 1.0, 0.8, 0.6)
+
+    def __init__(self, budget, clock=False, increment=0.0, phase=0.5):
+        self.start_time = time.time()
+        margin = min(0.1, 0.05 * budget)
+
+        if clock:
+            moves_to_go = 20 + 20 * phase
+            base = budget / moves_to_go + 0.8 * increment
+            # Less time in the opening, most of it in the middlegame
+            phase_factor = 0.75 + 2 * phase * (1 - phase) + 0.25 * (1 - phase)
+            self.hard_limit = min(budget * self.MAX_CLOCK_SHARE, base * 4, budget - margin)
+            self.soft_limit = min(base * phase_factor, self.hard_limit)
+        else:
+            self.hard_limit = budget - margin
+            self.soft_limit = self.hard_limit
+
+        self.hard_limit = max(0.0, self.hard_limit)
+        self.soft_limit = max(0.0, self.soft_limit)
+        self.stop_time = self.start_time + self.hard_limit
+
+        self.best_move = None
+        self.stable_iterations = 0
+
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    def update(self, best_move):
+        # Called after each completed iteration with its best move
+        if best_move == self.best_move:
+            self.stable_iterations += 1
+        else:
+            self.stable_iterations = 0
+        self.best_move = best_move
+
+    def soft_deadline(self):
+        scale = self.STABILITY_SCALE[min(self.stable_iterations, len(self.STABILITY_SCALE) - 1)]
+        return self.start_time + min(self.soft_limit * scale, self.hard_limit)
+
+    def should_stop(self):
+        return time.time() >= self.soft_deadline()
+
+    def can_finish(self, predicted_time):
+        # Whether an iteration predicted to take this long would end before the hard limit
+        return time.time() + predicted_time < self.stop_time
@@ -1,10 +1,20 @@
 import time
 
-def alpha_beta(board, color, depth, alpha, beta, is_maximizing, stop_time, transposition_table):
+from BoardGeometry import BoardGeometry
+from Bots.Gambit_eval import evaluate
+
+def alpha_beta(board, color, depth, alpha, beta, is_maximizing, stop_time, transposition_table, stats=None,
+               geometry=None, orientations=None):
 
     if time.time() >= stop_time:
         raise TimeoutError("Search time exceeded")
 
+    # Count visited nodes, used to measure the effective branching factor and to limit the search
+    if stats is not None:
+        stats['nodes'] += 1
+        if stats['nodes'] > stats.get('max_nodes', float('inf')):
+            raise TimeoutError("Node limit exceeded")
+
     board_hash = get_board_hash(board, color)
     original_alpha = alpha
 
@@ -23,19 +33,34 @@ def alpha_beta(board, color, depth, alpha, beta, is_maximizing, stop_time, trans
             if alpha >= beta:
                 return entry['value']
 
-    if depth == 0 or is_terminal(board, color):
-        return evaluate(board, color)
+    # The geometry and the orientation of each color's pawns are computed once at the root
+    if geometry is None:
+        geometry = BoardGeometry.of(board)
+    if orientations is None:
+        orientations = {}
+    orientation = orientations.get(color, 0)
+
+    # Same conditions as is_terminal, without generating the moves twice
+    possible_moves = None
+    if depth > 0 and not (is_king_missing(board, 'w') or is_king_missing(board, 'b')):
+        possible_moves = generate_moves(board, color, geometry, orientation)
 
-    possible_moves = generate_moves(board, color)
+    if not possible_moves:
+        # Scores are always from the point of view of the maximizing player, the root of the search
+        return evaluate(board, color if is_maximizing else opposite(color), geometry)
 
     best_eval = float('-inf') if is_maximizing else float('inf')
+    best_move = None
 
     if is_maximizing:
         #max_eval = float('-inf')
         for move in possible_moves:
-            new_board = do_move(board, move)
-            move_eval = alpha_beta(new_board, opposite(color), depth-1, alpha, beta, False, stop_time, transposition_table)
-            best_eval = max(best_eval, move_eval)
+            new_board = do_move(board, move, geometry, orientation)
+            move_eval = alpha_beta(new_board, opposite(color), depth-1, alpha, beta, False, stop_time, transposition_table, stats,
+                                   geometry, orientations)
+            if move_eval > best_eval:
+                best_eval = move_eval
+                best_move = move
             alpha = max(alpha, move_eval)
             if beta <= alpha:
                 break
@@ -43,9 +68,12 @@ def alpha_beta(board, color, depth, alpha, beta, is_maximizing, stop_time, trans
     else:
         #min_eval = float('inf')
         for move in possible_moves:
-            new_board = do_move(board, move)
-            move_eval = alpha_beta(new_board, opposite(color), depth-1, alpha, beta, True, stop_time, transposition_table)
-            best_eval = min(best_eval, move_eval)
+            new_board = do_move(board, move, geometry, orientation)
+            move_eval = alpha_beta(new_board, opposite(color), depth-1, alpha, beta, True, stop_time, transposition_table, stats,
+                                   geometry, orientations)
+            if move_eval < best_eval:
+                best_eval = move_eval
+                best_move = move
             beta = min(beta, move_eval)
             if beta <= alpha:
                 break
@@ -58,24 +86,51 @@ def alpha_beta(board, color, depth, alpha, beta, is_maximizing, stop_time, trans
     elif best_eval >= beta:
         entry_flag = 'LOWERBOUND' # We found a better move
 
-    # Store the result in the transposition table
+    # Store the result in the transposition table, with the best move to follow the principal variation
     transposition_table[board_hash] = {
         'value': best_eval,
         'depth': depth,
-        'flag': entry_flag
+        'flag': entry_flag,
+        'move': best_move
     }
 
     return best_eval
 
 
-def is_terminal(board, color):
+def principal_variation(board, color, depth, transposition_table, geometry, orientations):
+    """
+    Follow the best moves stored in the transposition table
+    :param board: The position after the first move of the line
+    :param color: The color to play in this position
+    :param depth: Maximum number of moves
+    :return: The list of moves, which stops early if the table doesn't know the position anymore
+    """
+    line = []
+    seen = set()
+    for _ in range(depth):
+        board_hash = get_board_hash(board, color)
+        entry = transposition_table.get(board_hash)
+        if entry is None or entry.get('move') is None or board_hash in seen:
+            break
+        move = entry['move']
+        orientation = orientations.get(color, 0)
+        if move not in generate_moves(board, color, geometry, orientation):
+            break
+        seen.add(board_hash)
+        line.append(move)
+        board = do_move(board, move, geometry, orientation)
+        color = opposite(color)
+    return line
+
+
+def is_terminal(board, color, geometry=None, orientation=0):
     # TODO
     # One king is missing
     if is_king_missing(board, 'w') or is_king_missing(board, 'b'):
         return True
 
     # No more possible moves
-    if len(generate_moves(board, color)) == 0:
+    if len(generate_moves(board, color, geometry, orientation)) == 0:
         return True
 
     # Other final conditions
@@ -84,176 +139,91 @@ def is_terminal(board, color):
     return False
 
 
-def evaluate(board, color):
-    # TODO
-    return 0
-
+def generate_moves(board, color, geometry=None, orientation=0):
+    """
+    Generate the moves of a player
+    :param board: The board, in the orientation of the bot
+    :param color: The color of the player
+    :param geometry: The geometry of the board (computed from the board if not given)
+    :param orientation: The orientation of the player's pawns (see BoardGeometry.player_orientations)
+    :return: The list of moves ((x, y), (x2, y2))
+    """
+    if geometry is None:
+        geometry = BoardGeometry.of(board)
+    rows = board.tolist()
+    pawn_push = geometry.pawn_push[orientation]
+    pawn_captures = geometry.pawn_captures[orientation]
+
+    def can_land(target):
+        tile = rows[target[0]][target[1]]
+        return tile == '' or tile[1] != color
 
-def generate_moves(board, color):
-    # TODO
     possible_moves = []
-    for x in range(board.shape[0]):
-        for y in range(board.shape[1]):
-            piece = board[x, y]
-            if piece != '' and piece[1] == color:
-                if piece[0] == 'p':
-                    if x + 1 < board.shape[0]:
-                        # Move forward
-                        if board[x + 1, y] == '':
-                            possible_moves.append(((x, y), (x + 1, y)))
-                        # Capture diagonally
-                        if y - 1 >= 0 and board[x + 1, y - 1] != '' and board[x + 1, y - 1][1] != color:
-                            possible_moves.append(((x, y), (x + 1, y - 1)))
-                        if y + 1 < board.shape[1] and board[x + 1, y + 1] != '' and board[x + 1, y + 1][1] != color:
-                            possible_moves.append(((x, y), (x + 1, y + 1)))
-                elif piece[0] == 'r':
-                    possible_moves.extend(rook_moves(board, x, y, color))
-                elif piece[0] == 'n':
-                    knight_moves = [
-                        (x + 2, y + 1), (x + 2, y - 1),
-                        (x - 2, y + 1), (x - 2, y - 1),
-                        (x + 1, y + 2), (x + 1, y - 2),
-                        (x - 1, y + 2), (x - 1, y - 2)
-                    ]
-                    for i, j in knight_moves:
-                        if 0 <= i < board.shape[0] and 0 <= j < board.shape[1]:
-                            if board[i, j] == '' or board[i, j][1] != color:
-                                possible_moves.append(((x, y), (i, j)))
-                elif piece[0] == 'b':
-                    possible_moves.extend(bishop_moves(board, x, y, color))
-                elif piece[0] == 'q':
-                    # Move straight
-                    possible_moves.extend(rook_moves(board, x, y, color))
-                    # Move diagonally
-                    possible_moves.extend(bishop_moves(board, x, y, color))
-                elif piece[0] == 'k':
-                    king_moves = [
-                        (x + 1, y), (x - 1, y),
-                        (x, y + 1), (x, y - 1),
-                        (x + 1, y + 1), (x + 1, y - 1),
-                        (x - 1, y + 1), (x - 1, y - 1)
-                    ]
-                    for i, j in king_moves:
-                        if 0 <= i < board.shape[0] and 0 <= j < board.shape[1]:
-                            if board[i, j] == '' or board[i, j][1] != color:
-                                possible_moves.append(((x, y), (i, j)))
+    for square in geometry.squares:
+        piece = rows[square[0]][square[1]]
+        if piece == '' or piece[1] != color:
+            continue
+        piece_type = piece[0]
+        if piece_type == 'p':
+            # Move forward
+            forward = pawn_push[square]
+            if forward is not None and rows[forward[0]][forward[1]] == '':
+                possible_moves.append((square, forward))
+            # Capture diagonally
+            for target in pawn_captures[square]:
+                tile = rows[target[0]][target[1]]
+                if tile != '' and tile[1] != color:
+                    possible_moves.append((square, target))
+        elif piece_type == 'n':
+            possible_moves.extend((square, target) for target in geometry.knight[square] if can_land(target))
+        elif piece_type == 'k':
+            possible_moves.extend((square, target) for target in geometry.king[square] if can_land(target))
+        else:
+            if piece_type == 'r':
+                rays = geometry.rook_rays[square]
+            elif piece_type == 'b':
+                rays = geometry.bishop_rays[square]
+            else:
+                rays = geometry.rays(square)
+            possible_moves.extend(slider_moves(rows, square, color, rays))
+
+    return possible_moves
 
+
+def slider_moves(rows, square, color, rays):
+    """
+    Generate the moves of a rook, bishop or queen along its rays, which already stop at the edges and holes
+    """
+    possible_moves = []
+    for ray in rays:
+        for target in ray:
+            tile = rows[target[0]][target[1]]
+            if tile == '':
+                possible_moves.append((square, target))
+            else:
+                if tile[1] != color:
+                    possible_moves.append((square, target))
+                break
     return possible_moves
 
 
-def do_move(board, move):
+def do_move(board, move, geometry=None, orientation=0):
+    """
+    Play a move on a copy of the board, promoting pawns to queens on the last rank of their direction
+    """
     origin = move[0]
     destination = move[1]
     new_board = board.copy()
     piece = new_board[origin]
     new_board[origin] = ''
+    if piece[0] == 'p' and geometry is not None and destination in geometry.promotion[orientation]:
+        piece = 'q' + piece[1]
     new_board[destination] = piece
     return new_board
 
 
 def is_king_missing(board, color):
-    king = 'k' + color
-    for x in range(board.shape[0]):
-        for y in range(board.shape[1]):
-            if board[x, y] == king:
-                return False
-    return True
-
-
-def rook_moves(board, x, y, color):
-    possible_moves = []
-    # Move forward
-    for i in range(x + 1, board.shape[0]):
-        if board[i, y] == '':
-            possible_moves.append(((x, y), (i, y)))
-        elif board[i, y][1] != color:
-            possible_moves.append(((x, y), (i, y)))
-            break
-        else:
-            break
-    # Move backward
-    for i in range(x - 1, -1, -1):
-        if board[i, y] == '':
-            possible_moves.append(((x, y), (i, y)))
-        elif board[i, y][1] != color:
-            possible_moves.append(((x, y), (i, y)))
-            break
-        else:
-            break
-    # Move right
-    for j in range(y + 1, board.shape[1]):
-        if board[x, j] == '':
-            possible_moves.append(((x, y), (x, j)))
-        elif board[x, j][1] != color:
-            possible_moves.append(((x, y), (x, j)))
-            break
-        else:
-            break
-    # Move left
-    for j in range(y - 1, -1, -1):
-        if board[x, j] == '':
-            possible_moves.append(((x, y), (x, j)))
-        elif board[x, j][1] != color:
-            possible_moves.append(((x, y), (x, j)))
-            break
-        else:
-            break
-
-    return possible_moves
-
-
-def bishop_moves(board, x, y, color):
-    possible_moves = []
-    # Diagonal up-right
-    i, j = x + 1, y + 1
-    while i < board.shape[0] and j < board.shape[1]:
-        if board[i, j] == '':
-            possible_moves.append(((x, y), (i, j)))
-        elif board[i, j][1] != color:
-            possible_moves.append(((x, y), (i, j)))
-            break
-        else:
-            break
-        i += 1
-        j += 1
-    # Diagonal up-left
-    i, j = x + 1, y - 1
-    while i < board.shape[0] and j >= 0:
-        if board[i, j] == '':
-            possible_moves.append(((x, y), (i, j)))
-        elif board[i, j][1] != color:
-            possible_moves.append(((x, y), (i, j)))
-            break
-        else:
-            break
-        i += 1
-        j -= 1
-    # Diagonal down-right
-    i, j = x - 1, y + 1
-    while i >= 0 and j < board.shape[1]:
-        if board[i, j] == '':
-            possible_moves.append(((x, y), (i, j)))
-        elif board[i, j][1] != color:
-            possible_moves.append(((x, y), (i, j)))
-            break
-        else:
-            break
-        i -= 1
-        j += 1
-    # Diagonal down-left
-    i, j = x - 1, y - 1
-    while i >= 0 and j >= 0:
-        if board[i, j] == '':
-            possible_moves.append(((x, y), (i, j)))
-        elif board[i, j][1] != color:
-            possible_moves.append(((x, y), (i, j)))
-            break
-        else:
-            break
-        i -= 1
-        j -= 1
-
-    return possible_moves
+    return not ('k' + color == board).any()
 
 
 def opposite(color):
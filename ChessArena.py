@@ -1,30 +1,30 @@
 import math
 import os.path
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 
 from PyQt6 import QtWidgets, QtGui
-from PyQt6 import uic
 from PyQt6.QtCore import QPointF, QTimer, QRectF
-from PyQt6.QtGui import QPixmap, QImage
+from PyQt6.QtGui import QImage, QPainter, QPixmap
 from PyQt6.QtWidgets import (
     QApplication,
     QFrame,
+    QGraphicsPixmapItem,
     QMessageBox,
-    QTableWidgetItem,
+    QHeaderView,
     QMainWindow,
 )
 
+from Animation import AnimationScheduler
 from BoardManager import BoardManager
 from BotWidget import BotWidget
 from Bots.ChessBotList import *
 from Data.UI import Ui_MainWindow
 from GameManager import GameManager
+from MoveHistory import MoveHistoryModel
 from ParallelPlayer import *
 from Piece import Piece
 from PieceManager import PieceManager
 
-from Bots import *
-
 
 #   Wrap up for QApplication
 class ChessApp(QtWidgets.QApplication):
@@ -49,17 +49,26 @@ class ChessArena(Ui_MainWindow, QMainWindow):
     def __init__(self):
         super().__init__()
 
-        uic.loadUi("Data/UI.ui", self)
+        self.setupUi(self)
 
         # Render for chess board
         self.chess_scene = QtWidgets.QGraphicsScene()
         self.chessboardView.setScene(self.chess_scene)
+        self.animations = AnimationScheduler(self)
+        # Fragment items detached from the scene, reused for the next explosions
+        self.fragment_pool: List[QGraphicsPixmapItem] = []
+        # Checkerboards by board shape and tile size, drawn by a single item
+        self.background_cache: Dict[tuple, QPixmap] = {}
+        self.background_item = self.chess_scene.addPixmap(QPixmap())
+        # Graphics items of the pieces by tile, the board itself only holds tile descriptions
+        self.piece_items: Dict[Tuple[int, int], Piece] = {}
 
         # Assets
         self.white_square: Optional[QPixmap] = None
         self.black_square: Optional[QPixmap] = None
         self.pieces_imgs: Dict[str, QImage] = {}
         self.load_assets()
+        self.bot_names: list[str] = list(discover_bots())
 
         # Variables
         self.game_manager: GameManager = GameManager(self)
@@ -75,8 +84,23 @@ class ChessArena(Ui_MainWindow, QMainWindow):
         self.actionUndo.triggered.connect(self.game_manager.undo_move)
         self.actionStart.triggered.connect(self.game_manager.start_stop)
         self.actionRedo.triggered.connect(self.game_manager.redo_move)
-
-        self.movesList.resizeColumnsToContents()
+        self.lowLatency.toggled.connect(self.game_manager.set_low_latency)
+        self.animationsEnabled.toggled.connect(self.animations.set_enabled)
+
+        # Multi-PV analysis panel, hidden until enabled
+        self.showLines.toggled.connect(self.update_multipv)
+        self.linesCount.valueChanged.connect(self.update_multipv)
+        self.update_multipv()
+
+        # Fixed column sizes: the view never measures its content
+        self.moves_model = MoveHistoryModel(self)
+        self.movesList.setModel(self.moves_model)
+        header = self.movesList.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        header.resizeSection(0, 48)
+        header.resizeSection(1, 160)
+        self.movesList.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.movesList.verticalHeader().hide()
 
         self.chessboardView.resizeEvent = self.update_chessboard
 
@@ -99,14 +123,27 @@ class ChessArena(Ui_MainWindow, QMainWindow):
     def select_and_load_board(self):
         """Open board file selector and load the selected file"""
         path = QtWidgets.QFileDialog.getOpenFileName(
-            self, "Select board", self.BOARDS_DIR, "Board File (*.brd *.fen)"
+            self, "Select board", self.BOARDS_DIR, "Board File (*.brd *.fen *.epd *.pbrd)"
         )
 
         if path is None:
             return
         path = path[0]
+        if path == "":
+            return
 
-        if self.board_manager.load_file(path):
+        # Files can contain many positions, one per line
+        index = 0
+        count = self.board_manager.get_position_count(path)
+        if count > 1:
+            number, ok = QtWidgets.QInputDialog.getInt(
+                self, "Select position", f"Position (1-{count})", 1, 1, count
+            )
+            if not ok:
+                return
+            index = number - 1
+
+        if self.board_manager.load_file(path, index):
             self.setup_board()
             self.setup_players()
             self.show_status("Board loaded")
@@ -122,9 +159,13 @@ class ChessArena(Ui_MainWindow, QMainWindow):
 
         piece.hide()
 
+        if not self.animations.enabled:
+            return
+
+        fragments = []
         for i in range(len(piece.fragments)):
             for j, fragment in enumerate(piece.fragments[i]):
-                fragmentItem = self.chess_scene.addPixmap(fragment)
+                fragmentItem = self.acquire_fragment(fragment)
 
                 center = piece.cutting_number / 2
 
@@ -144,12 +185,10 @@ class ChessArena(Ui_MainWindow, QMainWindow):
                     y_norm = k * vy
 
 
-                rect = fragmentItem.sceneBoundingRect()
-
-                x = pos.x() + i*rect.width()
-                y = pos.y() + j*rect.height()
+                x = pos.x() + i*fragment.width()
+                y = pos.y() + j*fragment.height()
 
-                piece.addFragmentItem(fragmentItem, QPointF(x + x_norm, y + y_norm))
+                fragments.append((fragmentItem, QPointF(x + x_norm, y + y_norm)))
             
                 # Mid
                 #fragmentItem.setPos(pos.x() + (rect.width() * (piece.cutting_number / 2)) - rect.width()/2,
@@ -159,7 +198,98 @@ class ChessArena(Ui_MainWindow, QMainWindow):
 
                 fragmentItem.setZValue(1000);
 
-        piece.explode()
+        self.animations.explode(fragments, self.release_fragments)
+
+    def acquire_fragment(self, pixmap: QPixmap) -> QGraphicsPixmapItem:
+        """
+        Get a fragment item from the pool, or a new one if it is empty, and add it to the scene
+        :param pixmap: The fragment's image
+        :return: The visible fragment item
+        """
+        item = self.fragment_pool.pop() if self.fragment_pool else QGraphicsPixmapItem()
+        item.setPixmap(pixmap)
+        item.setOpacity(1)
+        item.show()
+        self.chess_scene.addItem(item)
+        return item
+
+    def release_fragments(self, items: List[QGraphicsPixmapItem]):
+        """
+        Detach fragment items from the scene at the end of their animation, and put them back in the pool
+        :param items: The fragment items
+        """
+        for item in items:
+            if item.scene() is not None:
+                item.scene().removeItem(item)
+            self.fragment_pool.append(item)
+
+    def move_piece(self, piece: Piece, y: int, x: int):
+        """
+        Animate a piece to a tile
+        :param piece: The piece to move
+        :param y: Row of the tile
+        :param x: Column of the tile
+        """
+        tile_width = self.white_square.size().width()
+        tile_height = self.white_square.size().height()
+        self.animations.move(piece, QPointF(tile_width * x, tile_height * y))
+
+    def add_piece_item(self, tile: str, y: int, x: int) -> Piece:
+        """
+        Place a piece item on a tile, reusing a released item if possible
+        :param tile: The tile description, e.g. ``"pw"``
+        :param y: Row of the tile
+        :param x: Column of the tile
+        :return: The piece item
+        """
+        tile_width = self.white_square.size().width()
+        tile_height = self.white_square.size().height()
+        piece: Piece = PieceManager.get_piece(tile[1], tile[0])
+        self.animations.cancel(piece)
+        if piece.scene() is None:
+            self.chess_scene.addItem(piece)
+        piece.setPos(QPointF(tile_width * x, tile_height * y))
+        piece.setZValue(1000)
+        return piece
+
+    def show_move(self, start: Tuple[int, int], end: Tuple[int, int], promotion: Optional[str], explode: bool):
+        """
+        Update the scene after a move was applied on the board
+        :param start: Start coordinates of the move on the real board
+        :param end: End coordinates of the move on the real board
+        :param promotion: The new type of the piece, if it was promoted
+        :param explode: If ``True``, a captured piece explodes instead of simply disappearing
+        """
+        captured: Optional[Piece] = self.piece_items.pop(end, None)
+        if captured is not None:
+            if explode:
+                self.remove_piece(captured)
+            else:
+                captured.hide()
+            self.animations.cancel(captured)
+            PieceManager.release_pieces([captured])
+
+        piece: Piece = self.piece_items.pop(start)
+        self.piece_items[end] = piece
+        if promotion is not None:
+            PieceManager.upgrade_piece(piece, promotion)
+        self.move_piece(piece, *end)
+
+    def show_unmove(self, start: Tuple[int, int], end: Tuple[int, int], captured: Optional[str], promoted: bool):
+        """
+        Update the scene after a move was reverted on the board
+        :param start: Start coordinates of the move on the real board
+        :param end: End coordinates of the move on the real board
+        :param captured: The captured piece to put back, if any
+        :param promoted: If ``True``, the piece is turned back into a pawn
+        """
+        piece: Piece = self.piece_items.pop(end)
+        self.piece_items[start] = piece
+        if promoted:
+            PieceManager.upgrade_piece(piece, "p")
+        if captured is not None:
+            self.piece_items[end] = self.add_piece_item(captured, *end)
+        self.move_piece(piece, *start)
 
     def setup_board(self):
         """Render the current board position"""
@@ -168,42 +298,52 @@ class ChessArena(Ui_MainWindow, QMainWindow):
             path = self.board_manager.path
         self.currentBoardValue.setText(path)
 
-        self.chess_scene.clear()
+        # Running animations are finished so that explosion fragments go back to the pool
+        self.animations.finish()
 
         board = self.board_manager.board
         height, width = board.shape
 
+        self.background_item.setPixmap(self.get_background(height, width))
+
+        # The items of the previous board are reused, so that the scene only changes where the boards differ
+        PieceManager.release_pieces(list(self.piece_items.values()))
+        self.piece_items = {}
         for y in range(height):
             for x in range(width):
-                # Draw board square
-                square_color = (
-                    self.white_square if (x + y) % 2 == 0 else self.black_square
-                )
-                square_item = self.chess_scene.addPixmap(square_color)
-                square_item.setPos(
-                    QtCore.QPointF(
-                        square_color.size().width() * x,
-                        square_color.size().height() * y,
-                    )
-                )
-
-                # If tile is empty, continue
-                if board[y, x] in ("", "XX", None):
+                tile: str = board[y, x]
+                if tile in ("", "XX"):
                     continue
+                self.piece_items[(y, x)] = self.add_piece_item(tile, y, x)
 
-                piece: Piece = board[y, x]
-                
-                self.chess_scene.addItem(piece)
-                piece.setPos(
-                    QtCore.QPointF(
-                        square_color.size().width() * x,
-                        square_color.size().height() * y,
-                    )
-                )
-
-                piece.setZValue(1000)
+        # Only remove the pieces which are not on the new board (captured or from the previous board)
+        for pieces in PieceManager.PIECE_POOL.values():
+            for piece in pieces:
+                if piece.scene() is not None:
+                    self.chess_scene.removeItem(piece)
         self.update_chessboard()
 
+    def get_background(self, height: int, width: int) -> QPixmap:
+        """
+        Get the checkerboard for a board shape, rendered once in a single pixmap
+        :param height: Number of rows
+        :param width: Number of columns
+        :return: The checkerboard pixmap
+        """
+        tile_width = self.white_square.size().width()
+        tile_height = self.white_square.size().height()
+        key = (height, width, tile_width, tile_height)
+        if key not in self.background_cache:
+            background = QPixmap(width * tile_width, height * tile_height)
+            painter = QPainter(background)
+            for y in range(height):
+                for x in range(width):
+                    square = self.white_square if (x + y) % 2 == 0 else self.black_square
+                    painter.drawPixmap(tile_width * x, tile_height * y, square)
+            painter.end()
+            self.background_cache[key] = background
+        return self.background_cache[key]
+
     def setup_players(self):
         """Reset the game and set up player widgets list"""
         self.game_manager.reset()
@@ -216,8 +356,9 @@ class ChessArena(Ui_MainWindow, QMainWindow):
             player = BotWidget(color)
 
             bot_selector = player.playerBot
-            for name in CHESS_BOT_LIST:
-                bot_selector.addItem(name, CHESS_BOT_LIST[name])
+            # Bots are only imported when a game starts with them (see Player.get_func)
+            for name in self.bot_names:
+                bot_selector.addItem(name)
             bot_selector.setCurrentIndex(0)
             if i != 0:
                 sep = QtWidgets.QFrame()
@@ -244,7 +385,10 @@ class ChessArena(Ui_MainWindow, QMainWindow):
 
     def copy_board(self):
         """Copy the current board position as FEN in the clipboard"""
-        fen: str = self.board_manager.get_fen()
+        fen: Optional[str] = self.board_manager.get_fen(self.game_manager.turn)
+        if fen is None:
+            self.show_status("Only boards with a white and a black player can be described in FEN")
+            return
         QApplication.clipboard().setText(fen)
         self.show_status("Copied board FEN to clipboard")
 
@@ -254,15 +398,19 @@ class ChessArena(Ui_MainWindow, QMainWindow):
             self,
             "Save board as ...",
             self.BOARDS_DIR,
-            "Board File (*.brd *.fen)",
+            "Board File (*.brd *.fen *.pbrd)",
         )
         if path == "":
             return
-        self.board_manager.save(path)
-        self.show_status("Board exported")
+        if self.board_manager.save(path):
+            self.show_status("Board exported")
+        else:
+            self.show_status("Could not export the board")
 
     def reload_board(self):
         """Reload the board"""
+        self.game_manager.end_game(None)
+        self.game_manager.clear_history()
         self.board_manager.reload()
         self.setup_board()
         self.show_status("Board reloaded")
@@ -292,11 +440,29 @@ class ChessArena(Ui_MainWindow, QMainWindow):
         :param move: The move description
         :param player: The player who made the move
         """
-        tab = self.movesList
-        tab.insertRow(tab.rowCount())
-        tab.setItem(
-            tab.rowCount() - 1, 0, QTableWidgetItem(str(tab.rowCount()))
-        )
-        tab.setItem(tab.rowCount() - 1, 1, QTableWidgetItem(move))
-        tab.setItem(tab.rowCount() - 1, 2, QTableWidgetItem(player))
-        tab.resizeColumnsToContents()
+        self.moves_model.append(move, player)
+
+    def pop_move_from_history(self):
+        """Remove the last move from the history"""
+        self.moves_model.pop()
+
+    def update_multipv(self, *args):
+        """Show or hide the best lines panel, and ask the bots for the chosen number of lines"""
+        enabled = self.showLines.isChecked()
+        self.linesCount.setEnabled(enabled)
+        self.linesList.setVisible(enabled)
+        if not enabled:
+            self.linesList.clear()
+        self.game_manager.set_multipv(self.linesCount.value() if enabled else None)
+
+    def show_lines(self, lines: List[str]):
+        """
+        Show the best lines found by the last bot
+        :param lines: The descriptions of the lines
+        """
+        self.linesList.clear()
+        self.linesList.addItems(lines)
+
+    def clear_move_history(self):
+        """Remove every move from the history"""
+        self.moves_model.clear()
@@ -1,3 +1,28 @@
+from BoardGeometry import BoardGeometry
+
+
+def rotate_coordinates(
+    size: tuple[int, int], pt: tuple[int, int], rot: int
+) -> tuple[int, int]:
+    """
+    Rotate the given coordinates by the indicated angle
+    :param size: Size of the board in the current orientation
+    :param pt: Coordinates in the current orientation
+    :param rot: Number of 90° clockwise rotations to perform
+    :return: The rotated coordinates
+    """
+    rot = rot % 4
+    if rot == 0:
+        return pt
+
+    y, x = pt
+    y2 = size[0] - y - 1
+    x2 = size[1] - x - 1
+    if rot == 1:
+        return x, y2
+    if rot == 2:
+        return y2, x2
+    return x2, y
 
 
 def check_player_defeated(player_color, board):
@@ -29,53 +54,26 @@ def move_is_valid(player_order, move, board):
     def can_move_or_capture(pos):
         return is_free(pos) or team_at(pos) != player_team
 
-    def can_move_diagonally():
-        dx = end[0] - start[0]
-        dy = end[1] - start[1]
-
-        def stepto(end):
-            delta = 1 if end > 0 else -1
-            i = delta
-            while abs(i) < abs(end):
-                yield i
-                i += delta
-
-        if abs(dx) == abs(dy):  #   diagonal move
-            for x,y in zip(stepto(dx), stepto(dy)):
-                if not is_free((start[0]+x,start[1]+y)):
-                    return False
-            return can_move_or_capture(end)
-        else:   # Invalid bishop move (only diagonals)
-            return False
-
-    def can_move_along_axis():
-        dx = end[0] - start[0]
-        dy = end[1] - start[1]
-
-        if (dx == 0) != (dy == 0):  #   along the axis movement one must be equals to 0
-            dst = dx+dy
-            delta = 1 if dst > 0 else -1
-            Xaxis,Yaxis = (delta,0) if dx != 0 else (0,delta)
-
-            for i in range(1, abs(dst)):
-                if not is_free((start[0] + Xaxis * i, start[1] + Yaxis * i)):
-                    return False
-
-            return can_move_or_capture(end)
-        else:   # Invalid bishop move (only diagonals)
-            return False
+    def can_slide(rays):
+        #   The rays stop at the edges and holes, the squares before the end must be free
+        for ray in rays:
+            if end in ray:
+                for pos in ray[:ray.index(end)]:
+                    if not is_free(pos):
+                        return False
+                return can_move_or_capture(end)
+        return False
 
 
-    start, end = move
-    #   Check boundary condition
-    if start[0] < 0 or start[0] >= board.shape[0] or \
-       start[1] < 0 or start[1] >= board.shape[1]:
+    start, end = tuple(move[0]), tuple(move[1])
+    geometry = BoardGeometry.of(board)
+    #   Check boundary condition (holes are not part of the board)
+    if not geometry.is_valid(start):
        print("boundary 1")
        return False
 
     #   Check boundary condition
-    if end[0] < 0 or end[0] >= board.shape[0] or \
-       end[1] < 0 or end[1] >= board.shape[1]:
+    if not geometry.is_valid(end):
        print("boundary 2")
        return False
 
@@ -84,52 +82,47 @@ def move_is_valid(player_order, move, board):
         print("piece moved")
         return False
 
-    piece = board[start[0], start[1]]
-    
+    piece_type, piece_color = board[start[0], start[1]]
+
     #   Moving right color
-    if piece.color != player_color:
+    if piece_color != player_color:
         print("right color")
         return False
 
     #   check piece specific rules
-    if piece.type == 'p':
-        if end[0] != start[0] + 1: #    Pawn always move forward
+    if piece_type == 'p':
+        #   The board is in the player's orientation: pawns always move forward, towards growing rows
+        if end == geometry.pawn_push[0][start]:
+            print("free : ", is_free(end))
+            return is_free(end)
+
+        if end not in geometry.pawn_captures[0][start]:
             print("forward")
             return False
 
-        if end[1] == start[1]:
-            print("free : ", is_free(end))
-            return is_free(end)
-        
         if is_free(end):
             # Diagonal but no piece
             return False
         
         #   Capture ?
         print(team_at(end), "!=", player_team, "==", team_at(end) != player_team)
-        return abs(end[1] - start[1]) == 1 and (not is_free(end)) and team_at(end) != player_team
-    elif piece.type == 'n':
-        dx = abs(end[0] - start[0])
-        dy = abs(end[1] - start[1])
-
-        if (dx == 1 and dy == 2) or (dx == 2 and dy == 1):
+        return team_at(end) != player_team
+    elif piece_type == 'n':
+        if end in geometry.knight[start]:
             return can_move_or_capture(end)
         else: # invalid knight move
             return False
 
-    elif piece.type == 'b':
-        return can_move_diagonally()
-
-    elif piece.type == 'r':
-        return can_move_along_axis()
+    elif piece_type == 'b':
+        return can_slide(geometry.bishop_rays[start])
 
-    elif piece.type == "q":
-        return can_move_diagonally() != can_move_along_axis()
+    elif piece_type == 'r':
+        return can_slide(geometry.rook_rays[start])
 
-    elif piece.type == "k":
-        dx = abs(end[0] - start[0])
-        dy = abs(end[1] - start[1])
+    elif piece_type == "q":
+        return can_slide(geometry.rays(start))
 
-        return (-1 <= dx <= 1 and -1 <= dy <= 1) and can_move_or_capture(end)
+    elif piece_type == "k":
+        return end in geometry.king[start] and can_move_or_capture(end)
 
     return False
@@ -141,6 +141,13 @@ class Ui_MainWindow(object):
         self.autoMovesCount = QtWidgets.QSpinBox(parent=self.gameGroup)
         self.autoMovesCount.setObjectName("autoMovesCount")
         self.autoMoves.addWidget(self.autoMovesCount)
+        self.lowLatency = QtWidgets.QCheckBox(parent=self.gameGroup)
+        self.lowLatency.setObjectName("lowLatency")
+        self.autoMoves.addWidget(self.lowLatency)
+        self.animationsEnabled = QtWidgets.QCheckBox(parent=self.gameGroup)
+        self.animationsEnabled.setChecked(True)
+        self.animationsEnabled.setObjectName("animationsEnabled")
+        self.autoMoves.addWidget(self.animationsEnabled)
         self.verticalLayout_4.addLayout(self.autoMoves)
         self.movesSep = QtWidgets.QFrame(parent=self.gameGroup)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Fixed)
@@ -152,7 +159,7 @@ class Ui_MainWindow(object):
         self.movesSep.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
         self.movesSep.setObjectName("movesSep")
         self.verticalLayout_4.addWidget(self.movesSep)
-        self.movesList = QtWidgets.QTableWidget(parent=self.gameGroup)
+        self.movesList = QtWidgets.QTableView(parent=self.gameGroup)
         self.movesList.setEnabled(True)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Minimum)
         sizePolicy.setHorizontalStretch(0)
@@ -163,19 +170,34 @@ class Ui_MainWindow(object):
         self.movesList.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
         self.movesList.setShowGrid(True)
         self.movesList.setObjectName("movesList")
-        self.movesList.setColumnCount(3)
-        self.movesList.setRowCount(0)
-        item = QtWidgets.QTableWidgetItem()
-        self.movesList.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.movesList.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.movesList.setHorizontalHeaderItem(2, item)
         self.movesList.horizontalHeader().setDefaultSectionSize(100)
+        self.movesList.horizontalHeader().setHighlightSections(False)
         self.movesList.horizontalHeader().setMinimumSectionSize(20)
         self.movesList.horizontalHeader().setStretchLastSection(True)
         self.movesList.verticalHeader().setStretchLastSection(False)
         self.verticalLayout_4.addWidget(self.movesList)
+        self.analysisRow = QtWidgets.QHBoxLayout()
+        self.analysisRow.setObjectName("analysisRow")
+        self.showLines = QtWidgets.QCheckBox(parent=self.gameGroup)
+        self.showLines.setObjectName("showLines")
+        self.analysisRow.addWidget(self.showLines)
+        self.linesCount = QtWidgets.QSpinBox(parent=self.gameGroup)
+        self.linesCount.setMinimum(1)
+        self.linesCount.setMaximum(8)
+        self.linesCount.setProperty("value", 3)
+        self.linesCount.setObjectName("linesCount")
+        self.analysisRow.addWidget(self.linesCount)
+        self.verticalLayout_4.addLayout(self.analysisRow)
+        self.linesList = QtWidgets.QListWidget(parent=self.gameGroup)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Minimum)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.linesList.sizePolicy().hasHeightForWidth())
+        self.linesList.setSizePolicy(sizePolicy)
+        self.linesList.setMinimumSize(QtCore.QSize(0, 64))
+        self.linesList.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.linesList.setObjectName("linesList")
+        self.verticalLayout_4.addWidget(self.linesList)
         self.settingsPanel.addWidget(self.gameGroup)
         self.horizontalLayout.addLayout(self.settingsPanel)
         MainWindow.setCentralWidget(self.centralWidget)
@@ -241,7 +263,12 @@ class Ui_MainWindow(object):
         MainWindow.setTabOrder(self.prevMove, self.startStop)
         MainWindow.setTabOrder(self.startStop, self.nextMove)
         MainWindow.setTabOrder(self.nextMove, self.autoMovesCount)
-        MainWindow.setTabOrder(self.autoMovesCount, self.movesList)
+        MainWindow.setTabOrder(self.autoMovesCount, self.lowLatency)
+        MainWindow.setTabOrder(self.lowLatency, self.animationsEnabled)
+        MainWindow.setTabOrder(self.animationsEnabled, self.movesList)
+        MainWindow.setTabOrder(self.movesList, self.showLines)
+        MainWindow.setTabOrder(self.showLines, self.linesCount)
+        MainWindow.setTabOrder(self.linesCount, self.linesList)
 
     def retranslateUi(self, MainWindow):
         _translate = QtCore.QCoreApplication.translate
@@ -270,12 +297,16 @@ class Ui_MainWindow(object):
         self.nextMove.setToolTip(_translate("MainWindow", "Redo the next move"))
         self.nextMove.setStatusTip(_translate("MainWindow", "Redo the next move"))
         self.autoMovesLabel.setText(_translate("MainWindow", "Moves:"))
-        item = self.movesList.horizontalHeaderItem(0)
-        item.setText(_translate("MainWindow", "#"))
-        item = self.movesList.horizontalHeaderItem(1)
-        item.setText(_translate("MainWindow", "Move"))
-        item = self.movesList.horizontalHeaderItem(2)
-        item.setText(_translate("MainWindow", "Player"))
+        self.lowLatency.setToolTip(_translate("MainWindow", "End turns as soon as the bot answers, without waiting for the animations"))
+        self.lowLatency.setStatusTip(_translate("MainWindow", "End turns as soon as the bot answers, without waiting for the animations"))
+        self.lowLatency.setText(_translate("MainWindow", "Fast"))
+        self.animationsEnabled.setToolTip(_translate("MainWindow", "Animate piece moves and captures. Uncheck to skip animations during fast auto-play"))
+        self.animationsEnabled.setStatusTip(_translate("MainWindow", "Animate piece moves and captures. Uncheck to skip animations during fast auto-play"))
+        self.animationsEnabled.setText(_translate("MainWindow", "Animate"))
+        self.showLines.setToolTip(_translate("MainWindow", "Show the best lines found by the bots supporting multi-PV analysis"))
+        self.showLines.setStatusTip(_translate("MainWindow", "Show the best lines found by the bots supporting multi-PV analysis"))
+        self.showLines.setText(_translate("MainWindow", "Best lines:"))
+        self.linesCount.setToolTip(_translate("MainWindow", "Number of best moves searched by the bots"))
         self.menuBoard.setTitle(_translate("MainWindow", "&Board"))
         self.menuGame.setTitle(_translate("MainWindow", "&Game"))
         self.actionLoad.setText(_translate("MainWindow", "&Load"))
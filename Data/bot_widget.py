@@ -12,7 +12,8 @@ from PyQt6 import QtCore, QtGui, QtWidgets
 class Ui_Form(object):
     def setupUi(self, Form):
         Form.setObjectName("Form")
-        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Preferred, QtWidgets.QSizePolicy.Policy.Minimum)
+        Form.resize(156, 156)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Preferred, QtWidgets.QSizePolicy.Policy.Fixed)
         sizePolicy.setHorizontalStretch(0)
         sizePolicy.setVerticalStretch(0)
         sizePolicy.setHeightForWidth(Form.sizePolicy().hasHeightForWidth())
@@ -72,6 +73,27 @@ class Ui_Form(object):
         self.budgetValue.setObjectName("budgetValue")
         self.playerBudget.addWidget(self.budgetValue)
         self.verticalLayout.addLayout(self.playerBudget)
+        self.playerClock = QtWidgets.QHBoxLayout()
+        self.playerClock.setObjectName("playerClock")
+        self.clockEnabled = QtWidgets.QCheckBox(parent=Form)
+        self.clockEnabled.setObjectName("clockEnabled")
+        self.playerClock.addWidget(self.clockEnabled)
+        self.incrementValue = QtWidgets.QDoubleSpinBox(parent=Form)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Maximum, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.incrementValue.sizePolicy().hasHeightForWidth())
+        self.incrementValue.setSizePolicy(sizePolicy)
+        self.incrementValue.setObjectName("incrementValue")
+        self.playerClock.addWidget(self.incrementValue)
+        self.clockValue = QtWidgets.QLabel(parent=Form)
+        self.clockValue.setAlignment(QtCore.Qt.AlignmentFlag.AlignRight|QtCore.Qt.AlignmentFlag.AlignTrailing|QtCore.Qt.AlignmentFlag.AlignVCenter)
+        self.clockValue.setObjectName("clockValue")
+        self.playerClock.addWidget(self.clockValue)
+        self.verticalLayout.addLayout(self.playerClock)
+        self.profileEnabled = QtWidgets.QCheckBox(parent=Form)
+        self.profileEnabled.setObjectName("profileEnabled")
+        self.verticalLayout.addWidget(self.profileEnabled)
 
         self.retranslateUi(Form)
         QtCore.QMetaObject.connectSlotsByName(Form)
@@ -83,6 +105,12 @@ class Ui_Form(object):
         self.colorName.setText(_translate("Form", "TextLabel"))
         self.budgetLabel.setText(_translate("Form", "Budget:"))
         self.budgetValue.setSuffix(_translate("Form", "s"))
+        self.clockEnabled.setToolTip(_translate("Form", "Use the budget as a game clock, with an increment added after each move"))
+        self.clockEnabled.setText(_translate("Form", "Clock +"))
+        self.incrementValue.setSuffix(_translate("Form", "s"))
+        self.clockValue.setText(_translate("Form", "--"))
+        self.profileEnabled.setToolTip(_translate("Form", "Run this player\'s turns under cProfile and save one profile per turn in Data/profiles"))
+        self.profileEnabled.setText(_translate("Form", "Profile turns"))
 
 
 if __name__ == "__main__":
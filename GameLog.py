@@ -0,0 +1,207 @@
+import json
+import os
+import time
+from typing import List, Optional
+
+import numpy as np
+
+import BoardCodes
+
+
+class GameLogWriter:
+    """
+    Append-only game log
+
+    Each game is streamed to its own JSONL file, one record per line:
+
+    - ``{"type": "start", "board": [...], "player_order": ..., "players": [...], "fen": ...}``:
+      the initial board as .brd rows, the player sequence, the bots playing and the initial FEN
+    - ``{"type": "move", "ply": ..., "color": ..., "move": [[ys, xs], [yd, xd]], ...}``:
+      a move in board coordinates, with the moved and captured pieces, the promotion,
+      the time used, the bot statistics and the FEN of the resulting position
+    - ``{"type": "undo", "ply": ...}``: the moves from the given ply on were undone. A move logged
+      at an already played ply also replaces the moves after it
+    - ``{"type": "end", "result": ...}``: the winner's color, or ``null`` if the game was interrupted
+
+    FENs are ``null`` for boards which can't be described in FEN (see :func:`BoardFormats.format_fen`)
+
+    Every record is flushed as soon as it is written, so a crash loses at most the current move
+    """
+
+    LOG_DIRECTORY = os.path.join(os.path.abspath(os.path.dirname(__file__)), "Data", "games")
+
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            os.makedirs(self.LOG_DIRECTORY, exist_ok=True)
+            name = time.strftime("game_%Y%m%d_%H%M%S") + f"_{os.getpid()}.jsonl"
+            path = os.path.join(self.LOG_DIRECTORY, name)
+        self.path: str = path
+        self.file = open(path, "a")
+
+    def write(self, record: dict):
+        """
+        Append a record to the log
+        :param record: The record to write
+        """
+        if self.file is None:
+            return
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.file.flush()
+
+    def log_start(self, rows: List[str], player_order: str, players: List[dict], fen: Optional[str] = None):
+        """
+        Log the start of a game
+        :param rows: The initial board as .brd rows
+        :param player_order: The player sequence
+        :param players: A description of each player (color, bot, budget)
+        :param fen: The initial position in FEN
+        """
+        self.write({
+            "type": "start",
+            "time": time.time(),
+            "board": rows,
+            "player_order": player_order,
+            "players": players,
+            "fen": fen,
+        })
+
+    def log_move(self, ply: int, color: str, start, end, piece: str, capture: Optional[str],
+                 promotion: Optional[str], time_used: Optional[float], stats: Optional[dict] = None,
+                 fen: Optional[str] = None):
+        """
+        Log a move
+        :param ply: Index of the move in the game, starting at 0
+        :param color: Color of the player who moved
+        :param start: Start coordinates on the board
+        :param end: End coordinates on the board
+        :param piece: The moved piece
+        :param capture: The captured piece, if any
+        :param promotion: The type of the promoted piece, if any
+        :param time_used: Time taken by the player, in seconds
+        :param stats: Statistics reported by the bot
+        :param fen: The position after the move in FEN
+        """
+        self.write({
+            "type": "move",
+            "ply": ply,
+            "color": color,
+            "move": [[int(start[0]), int(start[1])], [int(end[0]), int(end[1])]],
+            "piece": piece,
+            "capture": capture,
+            "promotion": promotion,
+            "time_used": time_used,
+            "stats": stats or {},
+            "fen": fen,
+        })
+
+    def log_undo(self, ply: int):
+        """
+        Log that the moves from the given ply on were undone
+        :param ply: Index of the first undone move
+        """
+        self.write({"type": "undo", "ply": ply})
+
+    def log_end(self, result: Optional[str]):
+        """
+        Log the end of the game and close the file
+        :param result: The winner's color, or ``None`` if the game was interrupted
+        """
+        self.write({"type": "end", "result": result})
+        self.close()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class GameReplay:
+    """
+    Reader for game logs written by :class:`GameLogWriter`
+
+    Positions are rebuilt on compact code arrays (see :mod:`BoardCodes`) without any rendering.
+    A snapshot is kept every ``CHECKPOINT_INTERVAL`` plies, so jumping to any ply applies
+    at most that many moves.
+    """
+
+    CHECKPOINT_INTERVAL = 32
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.player_order: str = ""
+        self.players: List[dict] = []
+        self.moves: List[dict] = []
+        self.result: Optional[str] = None
+        self.initial: np.ndarray = np.array([], dtype=np.uint8)
+        self.initial_fen: Optional[str] = None
+
+        with open(path, "r") as f:
+            for line in f:
+                if line.strip() == "":
+                    continue
+                record = json.loads(line)
+                if record["type"] == "start":
+                    self.player_order = record["player_order"]
+                    self.players = record["players"]
+                    rows = [row.replace("--", "").split(",") for row in record["board"]]
+                    self.initial = BoardCodes.encode(np.array(rows, dtype=object))
+                    self.initial_fen = record.get("fen")
+                elif record["type"] == "move":
+                    # A move at an earlier ply replaces the moves after it (undone moves)
+                    del self.moves[record["ply"]:]
+                    self.moves.append(record)
+                elif record["type"] == "undo":
+                    del self.moves[record["ply"]:]
+                elif record["type"] == "end":
+                    self.result = record["result"]
+
+        self.checkpoints: List[np.ndarray] = [self.initial]
+        codes = self.initial.copy()
+        for ply, move in enumerate(self.moves, 1):
+            self.apply(codes, move)
+            if ply % self.CHECKPOINT_INTERVAL == 0:
+                self.checkpoints.append(codes.copy())
+
+    def __len__(self) -> int:
+        """Number of plies in the game"""
+        return len(self.moves)
+
+    @staticmethod
+    def apply(codes: np.ndarray, move: dict):
+        """
+        Apply a logged move on a code array
+        :param codes: The code array, modified in place
+        :param move: The move record
+        """
+        (ys, xs), (yd, xd) = move["move"]
+        piece = codes[ys, xs]
+        if move["promotion"]:
+            piece = BoardCodes.piece_code(move["promotion"], move["color"])
+        codes[yd, xd] = piece
+        codes[ys, xs] = BoardCodes.EMPTY
+
+    def board_at(self, ply: int) -> np.ndarray:
+        """
+        Get the position after the given number of plies
+        :param ply: Number of moves played, between 0 and ``len(self)``
+        :return: A new code array
+        """
+        if not 0 <= ply <= len(self.moves):
+            raise IndexError(f"Ply {ply} out of range (0-{len(self.moves)})")
+        index = ply // self.CHECKPOINT_INTERVAL
+        codes = self.checkpoints[index].copy()
+        for move in self.moves[index * self.CHECKPOINT_INTERVAL : ply]:
+            self.apply(codes, move)
+        return codes
+
+    def fen_at(self, ply: int) -> Optional[str]:
+        """
+        Get the FEN of the position after the given number of plies, as logged during the game
+        :param ply: Number of moves played, between 0 and ``len(self)``
+        :return: The FEN line, or ``None`` if the board can't be described in FEN or the log predates FENs
+        """
+        if not 0 <= ply <= len(self.moves):
+            raise IndexError(f"Ply {ply} out of range (0-{len(self.moves)})")
+        if ply == 0:
+            return self.initial_fen
+        return self.moves[ply - 1].get("fen")
@@ -1,51 +1,71 @@
 from __future__ import annotations
 
 import math
+import os
+import time
 from typing import List, Optional, TYPE_CHECKING, Tuple
 
 import numpy as np
 from PyQt6.QtCore import QTimer
 from PyQt6.QtGui import QIcon
 
+import BoardCodes
+from BoardGeometry import BoardGeometry
 from BoardManager import BoardManager
 from BotWidget import BotWidget
-from ChessRules import move_is_valid
-from ParallelPlayer import ParallelTurn
-from Piece import Piece
+from ChessRules import move_is_valid, rotate_coordinates
+from GameLog import GameLogWriter
+from ParallelPlayer import BotWorker, ParallelTurn, ProcessTurn
 from PieceManager import PieceManager
 from Player import Player
+from Profiling import PROFILE_DIRECTORY, turn_profile_path, write_summary
 
 if TYPE_CHECKING:
     from ChessArena import ChessArena
 
 
-def rotate_coordinates(
-    size: tuple[int, int], pt: tuple[int, int], rot: int
-) -> tuple[int, int]:
+class MoveDiff:
     """
-    Rotate the given coordinates by the indicated angle
-    :param size: Size of the board in the current orientation
-    :param pt: Coordinates in the current orientation
-    :param rot: Number of 90° clockwise rotations to perform
-    :return: The rotated coordinates
+    Reversible description of a played move, used to undo and redo it
+
+    Coordinates are given on the real board, pieces as tile descriptions (e.g. ``"pw"``)
     """
-    rot = rot % 4
-    if rot == 0:
-        return pt
 
-    y, x = pt
-    y2 = size[0] - y - 1
-    x2 = size[1] - x - 1
-    if rot == 1:
-        return x, y2
-    if rot == 2:
-        return y2, x2
-    return x2, y
+    __slots__ = ("start", "end", "piece", "captured", "promotion", "turn", "time_used", "clock", "stats", "fen_fields")
+
+    def __init__(
+        self,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        piece: str,
+        captured: Optional[str],
+        promotion: Optional[str],
+        turn: int,
+        time_used: Optional[float] = None,
+        stats: Optional[dict] = None,
+        clock: Optional[float] = None,
+    ):
+        self.start: tuple[int, int] = start
+        self.end: tuple[int, int] = end
+        self.piece: str = piece
+        self.captured: Optional[str] = captured
+        self.promotion: Optional[str] = promotion
+        self.turn: int = turn
+        self.time_used: Optional[float] = time_used
+        self.stats: dict = stats or {}
+        # Clock of the player before the move, None without clock
+        self.clock: Optional[float] = clock
+        # FEN fields before the move (see BoardManager.play_fen_fields)
+        self.fen_fields: tuple = ()
 
 
 class GameManager:
     MIN_WAIT = 500
     GRACE_RATIO = 0.05
+    # Run bots in one long-lived process per player instead of a thread per turn
+    USE_PROCESSES = True
+    # Stream every game to a log file (see GameLog)
+    LOG_GAMES = True
 
     def __init__(self, arena: ChessArena):
         self.arena: ChessArena = arena
@@ -53,21 +73,49 @@ class GameManager:
         self.players: list[Player] = []
         self.turn: int = 0
         self.nbr_turn_to_play: int = 0
-        self.current_player: Optional[ParallelTurn] = None
+        self.current_player: Optional[ParallelTurn | ProcessTurn] = None
         self.current_player_next_move = None
         self.current_player_color = None
         self.current_player_board = None
+        self.current_player_codes = None
+        self.current_player_start_time: float = 0
+        self.current_player_time: Optional[float] = None
+        self.current_player_stats: dict = {}
+        self.current_player_clock: Optional[float] = None
         self.player_finished: bool = False
+        # End turns as soon as the bot answers instead of waiting at least MIN_WAIT
+        self.low_latency: bool = False
+        # Number of best lines asked to the bots (multi-PV analysis), None to only ask for the best move
+        self.multipv: Optional[int] = None
         self.auto_playing: bool = False
+        self.game_started: bool = False
+        self.ply: int = 0
+        self.game_log: Optional[GameLogWriter] = None
+        self.game_name: str = ""
+        # Folder of the turn profiles of the current game, once a turn was profiled
+        self.profile_directory: Optional[str] = None
+        self.undo_stack: list[MoveDiff] = []
+        self.redo_stack: list[MoveDiff] = []
         self.timeout = QTimer()
         self.timeout.timeout.connect(lambda: self.end_turn(forced=True))
         self.min_wait = QTimer()
+        self.min_wait.setSingleShot(True)
         self.min_wait.timeout.connect(self.end_if_finished)
 
     def reset(self):
         """Reset the game"""
+        self.end_game(None)
+        for player in self.players:
+            player.close()
         self.players = []
         self.turn = 0
+        self.clear_history()
+
+    def clear_history(self):
+        """Forget the moves which can be undone and redone, and clear the moves list"""
+        self.undo_stack = []
+        self.redo_stack = []
+        self.arena.clear_move_history()
 
     def add_player(self, color: str, widget: BotWidget):
         """
@@ -75,7 +123,8 @@ class GameManager:
         :param color: The player's color
         :param widget: The bot widget
         """
-        player = Player(color, widget)
+        worker = BotWorker() if self.USE_PROCESSES else None
+        player = Player(color, widget, worker)
         self.players.append(player)
 
     def get_sequence(self, full: bool = False) -> str:
@@ -93,6 +142,71 @@ class GameManager:
             self.turn * 3 : self.turn * 3 + 3
         ]
 
+    def get_bot_board(self, func, rot: int):
+        """
+        Get the board in a player's orientation, in the format expected by its bot
+        :param func: The bot function or class
+        :param rot: Number of rotations of the player's orientation
+        :return: A read-only view of the code array for compact bots, a string matrix otherwise
+        """
+        if getattr(func, "compact_board", False):
+            codes = np.rot90(self.board_manager.codes, rot).view()
+            codes.setflags(write=False)
+            return codes
+        return np.array(np.rot90(self.board_manager.board, rot).tolist())
+
+    def start_game(self):
+        """Start a game session for every player"""
+        order: str = self.board_manager.player_order
+        for i, player in enumerate(self.players):
+            sequence: str = order[i * 3 : i * 3 + 3]
+            _, func = player.get_func()
+            player.start_session(self.get_bot_board(func, int(sequence[2])), sequence)
+            player.reset_clock()
+        self.game_started = True
+        self.ply = 0
+
+        self.game_name = time.strftime("game_%Y%m%d_%H%M%S") + f"_{os.getpid()}"
+        self.profile_directory = None
+
+        if self.LOG_GAMES:
+            self.game_log = GameLogWriter()
+            self.game_name = os.path.splitext(os.path.basename(self.game_log.path))[0]
+            self.game_log.log_start(
+                self.board_manager.get_rows(),
+                order,
+                [
+                    {
+                        "color": player.color,
+                        "bot": player.get_func()[0],
+                        "budget": player.get_budget(),
+                    }
+                    for player in self.players
+                ],
+                self.board_manager.get_fen(self.turn),
+            )
+
+    def end_game(self, result: Optional[str]):
+        """
+        End the game session of every player, if a game is in progress
+        :param result: The winner's color, or ``None`` if the game was interrupted
+        """
+        if not self.game_started:
+            return
+        for player in self.players:
+            player.end_session(result)
+        self.game_started = False
+
+        if self.game_log is not None:
+            self.game_log.log_end(result)
+            self.game_log = None
+
+        if self.profile_directory is not None:
+            summary = write_summary(self.profile_directory)
+            if summary is not None:
+                print(f"Profiling summary saved in '{summary}'")
+            self.profile_directory = None
+
     def next(self) -> bool:
         """
         Start a new turn
@@ -106,12 +220,22 @@ class GameManager:
 
         self.update_start_button(playing=True)
 
+        if not self.game_started:
+            self.start_game()
+
         board = self.board_manager.board
         player: Player = self.players[self.turn]
-        budget: float = player.get_budget()
+        budget: float = player.get_time_left()
         sequence: str = self.get_sequence()
         func_name, func = player.get_func()
         print(f"Player {self.turn}'s turn: {func_name} (budget: {budget:.2f}s)")
+        bot_kwargs = {
+            "clock": player.clock is not None,
+            "increment": player.get_increment() if player.clock is not None else 0.0,
+        }
+        if self.multipv is not None:
+            bot_kwargs["multipv"] = self.multipv
+        self.current_player_start_time = time.perf_counter()
 
         tile_width = self.arena.white_square.size().width()
         tile_height = self.arena.white_square.size().width()
@@ -120,6 +244,7 @@ class GameManager:
 
         self.current_player_color = player.color
         self.current_player_board = np.rot90(board, int(sequence[2]))
+        self.current_player_codes = np.rot90(self.board_manager.codes, int(sequence[2]))
 
         if func_name == "ManualMover":
             self.start_manual_turn(player)
@@ -127,35 +252,75 @@ class GameManager:
             budget_ms: int = int(budget * 1000 * (1 + self.GRACE_RATIO))
             self.timeout.start(budget_ms)
 
-            if self.MIN_WAIT < budget_ms:
-                self.min_wait.start(self.MIN_WAIT)
-
             return True
 
-        self.current_player = ParallelTurn(
-            func,
-            sequence,
-            BoardManager.get_string_board(self.current_player_board),
-            budget,
-            tile_width,
-            tile_height,
-        )
+        compact: bool = getattr(func, "compact_board", False)
+        bot_board = self.get_bot_board(func, int(sequence[2]))
+
+        profile_path: Optional[str] = None
+        if player.is_profiled():
+            self.profile_directory = os.path.join(PROFILE_DIRECTORY, self.game_name)
+            profile_path = turn_profile_path(self.profile_directory, self.ply, player.color, func_name)
 
-        self.current_player.setTerminationEnabled(True)
-        self.current_player.finished.connect(self.on_player_finished)
-        self.current_player.start()
+        budget_ms: int = int(budget * 1000 * (1 + self.GRACE_RATIO))
+        if player.worker is not None:
+            self.current_player = ProcessTurn(
+                player.worker,
+                func_name,
+                sequence,
+                bot_board,
+                budget,
+                budget_ms / 1000,
+                tile_width,
+                tile_height,
+                compact,
+                profile_path,
+                **bot_kwargs,
+            )
+        else:
+            self.current_player = ParallelTurn(
+                player.get_session(bot_board, sequence),
+                sequence,
+                bot_board,
+                budget,
+                tile_width,
+                tile_height,
+                compact,
+                profile_path,
+                **bot_kwargs,
+            )
+            self.current_player.setTerminationEnabled(True)
+
+        turn = self.current_player
+        turn.finished.connect(lambda: self.on_player_finished(turn))
 
         # Timer to call
         # self.timeout.singleShot(int(budget * 1000 * 1.05), lambda: self.end_turn(forced=True))
-        budget_ms: int = int(budget * 1000 * (1 + self.GRACE_RATIO))
-        self.timeout.start(budget_ms)
-        if self.MIN_WAIT < budget_ms:
-            self.min_wait.start(self.MIN_WAIT)
+        if isinstance(turn, ProcessTurn):
+            # The worker may still be starting or running session hooks, which aren't part of the turn
+            turn.ready.connect(lambda: self.start_turn_timers(turn, budget_ms))
+        else:
+            self.start_turn_timers(turn, budget_ms)
+
+        turn.start()
 
         return True
 
+    def start_turn_timers(self, turn: ParallelTurn | ProcessTurn, budget_ms: int):
+        """
+        Start the deadline and the minimum waiting time of a bot's turn
+        :param turn: The turn. Ignored if it is not the current turn anymore
+        :param budget_ms: The deadline of the turn, in milliseconds
+        """
+        if turn is not self.current_player:
+            return
+        self.current_player_start_time = time.perf_counter()
+        self.timeout.start(budget_ms)
+        if not self.low_latency and self.MIN_WAIT < budget_ms:
+            self.min_wait.start(self.MIN_WAIT)
+
     def start_manual_turn(self, player):
-        for piece in self.board_manager.pieces:
+        for piece in self.arena.piece_items.values():
             if piece.color == player.color:
                 piece.enableMovement(True)
                 piece.signals.released.connect(self.on_piece_released)
@@ -187,22 +352,60 @@ class GameManager:
 
         piece.setPos(snapped_x, snapped_y)
 
-        for p in self.board_manager.pieces:
+        self.stop_manual_turn(piece.color)
+
+        self.end_turn(forced=False, manual_move=move)
+
+    def stop_manual_turn(self, color: str):
+        """
+        Prevent the pieces from being moved by hand
+        :param color: The color of the manual player
+        """
+        for p in self.arena.piece_items.values():
             p.enableMovement(False)
 
-            if p.color == piece.color:
+            if p.color == color:
                 p.signals.released.disconnect()
 
-        self.end_turn(forced=False, manual_move=move)
 
+    def set_multipv(self, count: Optional[int]):
+        """
+        Set the number of best lines asked to the bots, from the next turn
+        :param count: The number of lines, or ``None`` to disable the multi-PV analysis
+        """
+        self.multipv = count
+
+    def set_low_latency(self, enabled: bool):
+        """
+        Enable or disable the low-latency mode
+
+        In low-latency mode, turns end as soon as the bot answers and captures are not animated,
+        so fast bots play at engine speed while the pieces' movement catches up on its own
+        :param enabled: ``True`` to end turns without waiting for ``MIN_WAIT``
+        """
+        self.low_latency = enabled
+        if enabled:
+            self.min_wait.stop()
+            if self.player_finished and self.current_player is not None:
+                self.end_turn()
+
+    def on_player_finished(self, turn: ParallelTurn | ProcessTurn):
+        """
+        Callback called by the player when it has finished playing
 
-    def on_player_finished(self):
-        """Callback called by the player when it has finished playing"""
+        Ends the turn right away unless the minimum waiting time is still running
+        :param turn: The turn which finished. Ignored if it is not the current turn anymore
+                     (e.g. it was terminated after a timeout)
+        """
+        if turn is not self.current_player:
+            return
         self.player_finished = True
+        if not self.min_wait.isActive():
+            self.end_turn()
 
     def end_if_finished(self):
         """Callback called after a minimum waiting time to end the turn if the player has already finished playing"""
-        if self.player_finished:
+        if self.player_finished and self.current_player is not None:
             self.end_turn()
 
     def end_turn(self, forced: bool = False, manual_move=None) -> bool:
@@ -218,10 +421,15 @@ class GameManager:
 
         if manual_move is not None:
             self.current_player_next_move = manual_move
+            self.current_player_time = time.perf_counter() - self.current_player_start_time
+            self.current_player_stats = {}
 
             self.min_wait.stop()
             self.timeout.stop()
 
+            if self.charge_clock():
+                return True
+
             self.apply_move()
 
             if self.check_game_end():
@@ -240,18 +448,41 @@ class GameManager:
             return True
 
         if self.current_player is None:
+            if forced and self.players[self.turn].clock is not None:
+                # A manual player ran out of time
+                self.min_wait.stop()
+                self.timeout.stop()
+                self.current_player_time = time.perf_counter() - self.current_player_start_time
+                if self.charge_clock():
+                    self.stop_manual_turn(self.players[self.turn].color)
+                    return True
             return False
 
         self.current_player_next_move = self.current_player.next_move
+        self.current_player_time = self.current_player.compute_time
+        if self.current_player_time is None:
+            self.current_player_time = time.perf_counter() - self.current_player_start_time
+        self.current_player_stats = self.current_player.stats
+        if self.multipv is not None:
+            self.show_lines(self.current_player_stats)
 
         self.min_wait.stop()
         self.timeout.stop()
         if forced:
             print("Player took too long, terminating thread")
+        elif isinstance(self.current_player, ProcessTurn) and self.current_player.latency is not None:
+            print(
+                f"Turn computed in {self.current_player.compute_time:.3f}s "
+                f"(worker latency: {self.current_player.latency * 1000:.1f}ms)"
+            )
 
-        self.current_player.terminate()
+        self.current_player.abort()
         self.current_player.quit()
 
+        if self.charge_clock():
+            self.current_player = None
+            return True
+
         self.apply_move()
 
         if self.check_game_end():
@@ -270,6 +501,31 @@ class GameManager:
 
         return True
 
+    def charge_clock(self) -> bool:
+        """
+        Charge the time used by the current player on its clock
+
+        If the player ran out of time, the game ends
+        :return: ``True`` if the player ran out of time, ``False`` otherwise
+        """
+        player: Player = self.players[self.turn]
+        self.current_player_clock = player.clock
+        player.spend_time(self.current_player_time)
+        if player.clock is None or player.clock > 0:
+            return False
+
+        # With two players, the other one wins on time
+        others = [p.color for p in self.players if p is not player]
+        winner: Optional[str] = others[0] if len(others) == 1 else None
+
+        color_name: str = PieceManager.COLOR_NAMES[player.color]
+        self.arena.show_message(
+            f"{color_name} player ran out of time", "End of game"
+        )
+        self.end_game(winner)
+        self.stop()
+        return True
+
     def start(self) -> bool:
         """
         Start a series of turns
@@ -334,13 +590,157 @@ class GameManager:
             print("Starting")
             self.start()
 
+    def is_turn_in_progress(self) -> bool:
+        """Check if a player is currently playing"""
+        return self.current_player is not None or self.timeout.isActive()
+
     def undo_move(self):
         """Undo the last move, if any"""
-        self.arena.show_message("This feature has not been implemented yet")
+        if self.auto_playing or self.is_turn_in_progress():
+            self.arena.show_status("Cannot undo a move while playing")
+            return
+        if len(self.undo_stack) == 0:
+            self.arena.show_status("No move to undo")
+            return
+
+        diff: MoveDiff = self.undo_stack.pop()
+        self.revert_diff(diff)
+        self.redo_stack.append(diff)
+
+        self.turn = diff.turn
+        self.players[diff.turn].set_clock(diff.clock)
+        self.ply -= 1
+        self.arena.pop_move_from_history()
+        self.notify_undo(diff.start, diff.end)
+        if self.game_log is not None:
+            self.game_log.log_undo(self.ply)
 
     def redo_move(self):
         """Redo the next move, if any"""
-        self.arena.show_message("This feature has not been implemented yet")
+        if self.auto_playing or self.is_turn_in_progress():
+            self.arena.show_status("Cannot redo a move while playing")
+            return
+        if len(self.redo_stack) == 0:
+            self.arena.show_status("No move to redo")
+            return
+
+        diff: MoveDiff = self.redo_stack.pop()
+        self.apply_diff(diff, animate=False)
+        self.undo_stack.append(diff)
+
+        player: Player = self.players[diff.turn]
+        player.set_clock(diff.clock)
+        player.spend_time(diff.time_used)
+        self.turn = (diff.turn + 1) % len(self.players)
+        self.record_move(diff)
+
+    def apply_diff(self, diff: MoveDiff, animate: bool = True):
+        """
+        Apply a move on the board and the scene
+        :param diff: The move to apply
+        :param animate: If ``True``, captured pieces explode instead of simply disappearing
+                        (except in low-latency mode)
+        """
+        board = self.board_manager.board
+        codes = self.board_manager.codes
+        (ys, xs), (yd, xd) = diff.start, diff.end
+
+        piece: str = diff.piece if diff.promotion is None else diff.promotion + diff.piece[1]
+        board[yd, xd] = piece
+        board[ys, xs] = ""
+        codes[yd, xd] = BoardCodes.STRING_TO_CODE[piece]
+        codes[ys, xs] = BoardCodes.EMPTY
+        diff.fen_fields = self.board_manager.play_fen_fields(diff.start, diff.end, diff.piece, diff.captured)
+
+        self.arena.show_move(diff.start, diff.end, diff.promotion, explode=animate and not self.low_latency)
+
+    def revert_diff(self, diff: MoveDiff):
+        """
+        Revert a move on the board and the scene
+        :param diff: The move to revert
+        """
+        board = self.board_manager.board
+        codes = self.board_manager.codes
+        (ys, xs), (yd, xd) = diff.start, diff.end
+
+        captured: str = diff.captured if diff.captured is not None else ""
+        board[ys, xs] = diff.piece
+        board[yd, xd] = captured
+        codes[ys, xs] = BoardCodes.STRING_TO_CODE[diff.piece]
+        codes[yd, xd] = BoardCodes.STRING_TO_CODE[captured]
+        self.board_manager.restore_fen_fields(diff.fen_fields)
+
+        self.arena.show_unmove(diff.start, diff.end, diff.captured, diff.promotion is not None)
+
+    def format_move(self, real_start: tuple[int, int], real_end: tuple[int, int]) -> str:
+        """
+        Get the description of a move shown in the history
+        :param real_start: Start coordinates of the move on the real board
+        :param real_end: End coordinates of the move on the real board
+        :return: The move description
+        """
+        real_height, real_width = self.board_manager.board.shape
+        col1 = "ABCDEFGH"[real_width - 1 - real_start[1]]
+        col2 = "ABCDEFGH"[real_width - 1 - real_end[1]]
+        row1 = real_start[0] + 1
+        row2 = real_end[0] + 1
+        return f"{col1}{row1} -> {col2}{row2}"
+
+    def show_lines(self, stats: dict):
+        """
+        Show the best lines reported by the current player (multi-PV analysis)
+        :param stats: Statistics of the turn, with the lines in ``stats["lines"]``
+        """
+        lines = stats.get("lines")
+        if not lines:
+            self.arena.show_lines([])
+            return
+        shape = self.current_player_board.shape
+        rot: int = int(self.get_sequence()[2])
+
+        def describe(move) -> str:
+            start, end = move
+            return self.format_move(
+                rotate_coordinates(shape, (int(start[0]), int(start[1])), rot),
+                rotate_coordinates(shape, (int(end[0]), int(end[1])), rot),
+            )
+
+        rows = [f"{PieceManager.COLOR_NAMES[self.current_player_color]}, depth {stats.get('depth')}"]
+        for i, line in enumerate(lines):
+            score = line.get("score")
+            score = "?" if score is None else f"{score:+.0f}"
+            # Lines from the previous iteration of an interrupted search are shallower
+            if line.get("depth") is not None and line["depth"] != stats.get("depth"):
+                score += f" (depth {line['depth']})"
+            rows.append(f"{i + 1}. {score}  " + ", ".join(describe(move) for move in line.get("pv") or [line["move"]]))
+        self.arena.show_lines(rows)
+
+    def record_move(self, diff: MoveDiff):
+        """
+        Record a move which was just applied: history, bot sessions and game log
+        :param diff: The move
+        """
+        color: str = diff.piece[1]
+        self.arena.push_move_to_history(
+            self.format_move(diff.start, diff.end), PieceManager.COLOR_NAMES[color]
+        )
+
+        self.notify_move(diff.start, diff.end)
+
+        if self.game_log is not None:
+            self.game_log.log_move(
+                self.ply,
+                color,
+                diff.start,
+                diff.end,
+                diff.piece,
+                diff.captured,
+                diff.promotion,
+                diff.time_used,
+                diff.stats,
+                self.board_manager.get_fen((diff.turn + 1) % len(self.players)),
+            )
+        self.ply += 1
 
     def apply_move(self) -> bool:
         """
@@ -356,9 +756,6 @@ class GameManager:
         color_name: str = PieceManager.COLOR_NAMES[color]
         board = self.current_player_board
 
-        tile_width = self.arena.white_square.size().width()
-        tile_height = self.arena.white_square.size().width()
-
         start_piece = board[start[0], start[1]]
 
         if not move_is_valid(self.get_sequence(True), move, board):
@@ -367,53 +764,71 @@ class GameManager:
 
         end_piece = board[end[0], end[1]]
 
-        start_piece_and_col = f"{start_piece.type}{start_piece.color}"
-
         print(
-            f"{color_name} moved {PieceManager.get_piece_name(start_piece_and_col)} from {start} to {end}"
+            f"{color_name} moved {PieceManager.get_piece_name(start_piece)} from {start} to {end}"
         )
 
         # Capture
         if end_piece != '':
-            end_piece_and_col = f"{end_piece.type}{end_piece.color}"
-
             print(
-                f"{color_name} captured {PieceManager.get_piece_name(end_piece_and_col)}"
+                f"{color_name} captured {PieceManager.get_piece_name(end_piece)}"
             )
 
-        # Apply move
-        board[end[0], end[1]] = start_piece
-        board[start[0], start[1]] = ""
-
-        if type(end_piece) is Piece:
-            print("longueur avant : ", len(self.board_manager.pieces))
-            self.board_manager.pieces = [p for p in self.board_manager.pieces if p is not end_piece]
-            print("longueur après : ", len(self.board_manager.pieces))
-
-            self.arena.remove_piece(end_piece)
-        
         # Promotion
-        if start_piece[0] == "p" and end[0] == board.shape[0] - 1:
-            PieceManager.upgrade_piece(board[end[0], end[1]], 'q')
+        promotion: Optional[str] = None
+        if start_piece[0] == "p" and tuple(end) in BoardGeometry.of(board).promotion[0]:
+            promotion = 'q'
 
         sequence: str = self.get_sequence()
         rot: int = int(sequence[2])
-        real_start = rotate_coordinates(board.shape, start, rot)
-        real_end = rotate_coordinates(board.shape, end, rot)
-        real_height, real_width = self.board_manager.board.shape
-        col1 = "ABCDEFGH"[real_width - 1 - real_start[1]]
-        col2 = "ABCDEFGH"[real_width - 1 - real_end[1]]
-        
-        start_piece.move(real_end[0], real_end[1], tile_width, tile_height);
-
-        row1 = real_start[0] + 1
-        row2 = real_end[0] + 1
-        self.arena.push_move_to_history(
-            f"{col1}{row1} -> {col2}{row2}", color_name
+        diff = MoveDiff(
+            rotate_coordinates(board.shape, start, rot),
+            rotate_coordinates(board.shape, end, rot),
+            start_piece,
+            end_piece if end_piece != "" else None,
+            promotion,
+            self.turn,
+            self.current_player_time,
+            self.current_player_stats,
+            self.current_player_clock,
         )
+        self.apply_diff(diff)
+        self.undo_stack.append(diff)
+        self.redo_stack = []
+        self.record_move(diff)
 
         return True
 
+    def notify_move(self, real_start: tuple[int, int], real_end: tuple[int, int]):
+        """
+        Notify every player's session of a move, in their own orientation
+        :param real_start: Start coordinates of the move on the real board
+        :param real_end: End coordinates of the move on the real board
+        """
+        order: str = self.board_manager.player_order
+        shape = self.board_manager.board.shape
+        for i, player in enumerate(self.players):
+            rot = int(order[i * 3 + 2])
+            player.notify_move((
+                rotate_coordinates(shape, real_start, -rot),
+                rotate_coordinates(shape, real_end, -rot),
+            ))
+
+    def notify_undo(self, real_start: tuple[int, int], real_end: tuple[int, int]):
+        """
+        Notify every player's session that a move was undone, in their own orientation
+        :param real_start: Start coordinates of the move on the real board
+        :param real_end: End coordinates of the move on the real board
+        """
+        order: str = self.board_manager.player_order
+        shape = self.board_manager.board.shape
+        for i, player in enumerate(self.players):
+            rot = int(order[i * 3 + 2])
+            player.notify_undo((
+                rotate_coordinates(shape, real_start, -rot),
+                rotate_coordinates(shape, real_end, -rot),
+            ))
+
     def check_game_end(self):
         board = self.current_player_board
         current_color = self.current_player_color
@@ -427,4 +842,5 @@ class GameManager:
         self.arena.show_message(
             f"{color_name} player won the match", "End of game"
         )
+        self.end_game(current_color)
         self.stop()
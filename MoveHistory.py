@@ -0,0 +1,89 @@
+from typing import Any, List, Tuple
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QObject, Qt, QTimer
+
+
+class MoveHistoryModel(QAbstractTableModel):
+    """
+    Table model of the moves played, shown in the moves list
+
+    Moves are kept in a plain list and rows are only generated when the view draws them.
+    Added moves are inserted in the model in batches, at most every ``BATCH_INTERVAL`` ms,
+    so a fast auto-play only triggers one view update per batch
+    """
+
+    HEADERS = ("#", "Move", "Player")
+    BATCH_INTERVAL = 50
+
+    def __init__(self, parent: QObject = None):
+        super().__init__(parent)
+        self.moves: List[Tuple[str, str]] = []
+        self.pending: List[Tuple[str, str]] = []
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(self.BATCH_INTERVAL)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.moves)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        if index.column() == 0:
+            return str(index.row() + 1)
+        return self.moves[index.row()][index.column() - 1]
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+
+    def append(self, move: str, player: str):
+        """
+        Add a move, shown with the next batch
+        :param move: The move description
+        :param player: The player who made the move
+        """
+        self.pending.append((move, player))
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def pop(self):
+        """Remove the last move"""
+        if self.pending:
+            self.pending.pop()
+            return
+        if self.moves:
+            row = len(self.moves) - 1
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self.moves.pop()
+            self.endRemoveRows()
+
+    def flush(self):
+        """Insert the pending moves in the model"""
+        self.flush_timer.stop()
+        if not self.pending:
+            return
+        first = len(self.moves)
+        self.beginInsertRows(QModelIndex(), first, first + len(self.pending) - 1)
+        self.moves.extend(self.pending)
+        self.pending = []
+        self.endInsertRows()
+
+    def clear(self):
+        """Remove every move"""
+        self.flush_timer.stop()
+        self.pending = []
+        self.beginResetModel()
+        self.moves = []
+        self.endResetModel()
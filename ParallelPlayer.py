@@ -1,15 +1,25 @@
+import multiprocessing
+import threading
+import time
+import traceback
+from typing import Optional
+
 import numpy as np
 from PyQt6 import QtCore
 
+from Profiling import run_profiled
+
 
 class ParallelTurn(QtCore.QThread):
     """ Thread wrapper """
 
-    def __init__(self, ai_func, player_sequence, board, time_budget, tile_width, tile_height):
+    def __init__(self, session, player_sequence, board, time_budget, tile_width, tile_height, compact=False,
+                 profile_path=None, **kwargs):
         super().__init__()
 
-        self.ai_func = ai_func
+        self.session = session
         self.board = board
+        self.compact = compact
         self.player_sequence = player_sequence
         self.time_budget = time_budget
 
@@ -19,14 +29,291 @@ class ParallelTurn(QtCore.QThread):
 
         self.tile_width = tile_width
         self.tile_height = tile_height
+        # Additional arguments given to the bot (clock information, ...)
+        self.kwargs = kwargs
+        # If set, the turn is run under cProfile and the profile is saved there
+        self.profile_path: Optional[str] = profile_path
+
+        self.next_move = ((0,0), (0,0))
+        self.compute_time: Optional[float] = None
+        self.stats: dict = {}
+
+    def run(self):
+        start = time.perf_counter()
+        # Compact boards are read-only views and are handed over as is
+        self.next_move = run_profiled(self.profile_path,
+                                      self.session.choose_move,
+                                      self.board if self.compact else np.copy(self.board),
+                                      self.time_budget,
+                                      tile_width=self.tile_width,
+                                      tile_height=self.tile_height,
+                                      **self.kwargs)
+        self.compute_time = time.perf_counter() - start
+        self.stats = dict(self.session.stats)
+
+    def abort(self):
+        """Stop the bot if it is still running"""
+        self.terminate()
+
+
+def _worker_loop(conn):
+    """
+    Entry point of a bot worker process
+
+    Serves requests received through ``conn``, importing each bot module the first time it is used,
+    until ``None`` is received or the pipe is closed. Requests are tuples starting with a command:
+
+    - ``("start", bot_name, board, player_sequence)``: start a new game session
+    - ``("move", move)``: notify the session of a move
+    - ``("undo", move)``: notify the session that a move was undone
+    - ``("end", result)``: end the session
+    - ``("turn", bot_name, player_sequence, board, time_budget, kwargs, profile_path)``: choose a move,
+      under cProfile if ``profile_path`` is not ``None``
+
+    Turns are answered with ``(move, compute_time, stats)``, other commands with ``"ok"``
+    :param conn: The worker's end of the pipe
+    """
+    from Bots.ChessBotList import create_session, load_bot
+
+    conn.send("ready")
+
+    session = None
+    session_name = None
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+
+        command, *args = request
+        if command == "turn":
+            bot_name, player_sequence, board, time_budget, kwargs, profile_path = args
+            if board.dtype == np.uint8:
+                board.setflags(write=False)
+            start = time.perf_counter()
+            stats = {}
+            try:
+                # Sessions are started before the turn (see BotWorker.play), unless the start command failed
+                if session is None or session_name != bot_name:
+                    session = create_session(load_bot(bot_name))
+                    session_name = bot_name
+                    session.on_game_start(board, player_sequence)
+                move = run_profiled(profile_path, session.choose_move, board, time_budget, **kwargs)
+                stats = dict(session.stats)
+            except Exception:
+                traceback.print_exc()
+                move = ((0,0), (0,0))
+            conn.send((move, time.perf_counter() - start, stats))
+            continue
+
+        try:
+            if command == "start":
+                bot_name, board, player_sequence = args
+                session = create_session(load_bot(bot_name))
+                session_name = bot_name
+                session.on_game_start(board, player_sequence)
+            elif command == "move" and session is not None:
+                session.on_move(*args)
+            elif command == "undo" and session is not None:
+                session.on_undo(*args)
+            elif command == "end" and session is not None:
+                session.on_game_end(*args)
+                session = None
+                session_name = None
+        except Exception:
+            traceback.print_exc()
+        conn.send("ok")
+
+
+class BotWorker:
+    """
+    Long-lived process running the bots of a single player
+
+    The process is spawned once and reused for every turn, so the bots run on their own core
+    without sharing the GIL with the GUI, and module-level state survives between turns.
+    It is only killed and respawned when a turn exceeds its deadline.
+    """
+
+    CONTEXT = multiprocessing.get_context("spawn")
+    # Maximum time for the worker to answer the commands sent before a turn (imports, session hooks), in seconds
+    READY_TIMEOUT = 30.0
+
+    def __init__(self):
+        self.process = None
+        self.conn = None
+        self.pending: int = 0
+        # Arguments of the ``start`` command of the current session, sent again to a respawned worker
+        self.session_start: Optional[tuple] = None
+        self.lock = threading.Lock()
+        self.spawn()
+
+    def spawn(self):
+        """Start a new worker process"""
+        parent_conn, child_conn = self.CONTEXT.Pipe()
+        self.process = self.CONTEXT.Process(target=_worker_loop, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        # Answers not read yet: the worker sends one when its imports are done
+        self.pending: int = 1
+        # The session is rebuilt right away, so that it isn't rebuilt during the next turn
+        if self.session_start is not None:
+            self.conn.send(("start", *self.session_start))
+            self.pending += 1
+
+    def kill(self):
+        """Kill the worker process, if running. The next turn will spawn a new one"""
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+
+    def respawn(self):
+        """Kill the worker process and start a fresh one"""
+        self.kill()
+        self.process.join()
+        self.conn.close()
+        self.spawn()
+
+    def close(self):
+        """Ask the worker process to exit and wait for it"""
+        if self.process is None:
+            return
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(1)
+        self.kill()
+        self.conn.close()
+        self.process = None
+
+    def send(self, command: str, *args):
+        """
+        Send a session command (``start``, ``move``, ``undo`` or ``end``) to the worker without waiting for it
+
+        The acknowledgement is read before the next turn, so the time spent in
+        session hooks is not counted in the turn's budget
+        :param command: The command name
+        :param args: The command arguments
+        """
+        with self.lock:
+            if not self.process.is_alive():
+                self.respawn()
+            if command == "start":
+                self.session_start = args
+            elif command == "end":
+                self.session_start = None
+            try:
+                self.conn.send((command, *args))
+                self.pending += 1
+            except (BrokenPipeError, OSError):
+                print("Bot worker stopped, respawning")
+                self.respawn()
+
+    def play(self, bot_name: str, player_sequence: str, board, time_budget: float, timeout: float,
+             profile_path: Optional[str] = None, on_ready=None, **kwargs):
+        """
+        Run one turn in the worker process
+
+        :param bot_name: The name under which the bot is registered
+        :param player_sequence: The player sequence given to the bot
+        :param board: The board given to the bot
+        :param time_budget: The time budget given to the bot
+        :param timeout: Maximum time to wait for the answer, in seconds, from the moment the turn is sent.
+                        The worker is respawned if it is exceeded
+        :param profile_path: If set, the turn is run under cProfile in the worker and the profile is saved there
+        :param on_ready: Called once the worker is ready, right before the turn is sent
+        :return: A tuple ``(move, compute_time, latency, stats)``, or ``None`` if the bot timed out or crashed
+        """
+        with self.lock:
+            if not self.process.is_alive():
+                self.respawn()
+            try:
+                # A new session is started outside the turn if the player changed bot
+                if self.session_start is None or self.session_start[0] != bot_name:
+                    self.conn.send(("start", bot_name, board, player_sequence))
+                    self.pending += 1
+                # A respawned worker restarts its session from the board of this turn
+                self.session_start = (bot_name, board, player_sequence)
+
+                # Wait for the imports and session hooks to finish so they don't count in the turn's budget
+                while self.pending > 0:
+                    if not self.conn.poll(self.READY_TIMEOUT):
+                        print("Bot worker not ready, respawning")
+                        self.respawn()
+                        return None
+                    self.conn.recv()
+                    self.pending -= 1
+
+                if on_ready is not None:
+                    on_ready()
+                start = time.perf_counter()
+                self.conn.send(("turn", bot_name, player_sequence, board, time_budget, kwargs, profile_path))
+                if not self.conn.poll(timeout):
+                    print("Bot worker timed out, respawning")
+                    self.respawn()
+                    return None
+                move, compute_time, stats = self.conn.recv()
+            except (EOFError, BrokenPipeError, OSError):
+                print("Bot worker stopped, respawning")
+                self.respawn()
+                return None
+
+            round_trip = time.perf_counter() - start
+            return move, compute_time, round_trip - compute_time, stats
+
+
+class ProcessTurn(QtCore.QThread):
+    """
+    Thread waiting for a turn played in a :class:`BotWorker`
+
+    Has the same interface as :class:`ParallelTurn`, but the bot itself runs in the worker process.
+    ``ready`` is emitted when the worker is ready and the turn is sent, so the deadline of the turn starts there
+    """
+
+    ready = QtCore.pyqtSignal()
+
+    def __init__(self, worker: BotWorker, bot_name, player_sequence, board, time_budget, timeout, tile_width, tile_height, compact=False,
+                 profile_path=None, **kwargs):
+        super().__init__()
+
+        self.worker = worker
+        self.bot_name = bot_name
+        self.board = board
+        self.compact = compact
+        self.player_sequence = player_sequence
+        self.time_budget = time_budget
+        self.timeout = timeout
+
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.kwargs = kwargs
+        self.profile_path: Optional[str] = profile_path
 
         self.next_move = ((0,0), (0,0))
+        self.compute_time: Optional[float] = None
+        self.latency: Optional[float] = None
+        self.stats: dict = {}
 
     def run(self):
-        self.next_move = self.ai_func(self.player_sequence,
-                            np.copy(self.board),
-                            self.time_budget,
-                            tile_width=self.tile_width,
-                            tile_height=self.tile_height)
-        
+        # Compact boards are sent as raw uint8 buffers, without any per-tile conversion
+        board = np.ascontiguousarray(self.board) if self.compact else np.copy(self.board)
+        result = self.worker.play(self.bot_name,
+                                  self.player_sequence,
+                                  board,
+                                  self.time_budget,
+                                  self.timeout,
+                                  self.profile_path,
+                                  self.ready.emit,
+                                  tile_width=self.tile_width,
+                                  tile_height=self.tile_height,
+                                  **self.kwargs)
+        if result is not None:
+            self.next_move, self.compute_time, self.latency, self.stats = result
 
+    def abort(self):
+        """Kill the worker if the bot is still running"""
+        if self.isRunning():
+            self.worker.kill()
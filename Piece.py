@@ -1,7 +1,6 @@
 
-import math
-from typing import List, Optional
-from PyQt6.QtCore import QObject, QPointF, QTimer, pyqtSignal
+from typing import Dict, List, Optional
+from PyQt6.QtCore import QObject, QPointF, pyqtSignal
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtWidgets import QGraphicsPixmapItem
 
@@ -9,20 +8,16 @@ class PieceSignals(QObject):
     released = pyqtSignal(object, QPointF, QPointF)
 
 class Piece(QGraphicsPixmapItem):
+    # Fragments of each sprite, shared by all the pieces using it and only cut on the first capture.
+    # Keyed by the pixmap's cache key, which is the same for every piece sharing the sprite
+    FRAGMENT_CACHE: Dict[tuple, List[List[QPixmap]]] = {}
+
     def __init__(self, img: QPixmap, piece_type: str, color: str):
         super().__init__(img)
 
         self.type = piece_type
         self.color = color
 
-        self.target = QPointF()
-        self.move_timer = QTimer()
-        self.explode_timer = QTimer()
-        self.move_timer.timeout.connect(self._move_tick)
-        self.explode_timer.timeout.connect(self._explode_tick)
-        self.speed = 10
-        self.fragments: List[List[QPixmap]] = []
-        self.fragmentItems: List[Tuple[QGraphicsPixmapItem, QPointF]] = []
         self.cutting_number = 5
 
         self.old_pos = QPointF()
@@ -32,10 +27,18 @@ class Piece(QGraphicsPixmapItem):
         self.setFlag(QGraphicsPixmapItem.GraphicsItemFlag.ItemIsMovable, False)
         self.setFlag(QGraphicsPixmapItem.GraphicsItemFlag.ItemIsSelectable, False)
 
-        self._fragment()
-
         self.signals = PieceSignals()
 
+    def reset(self):
+        """Reset the piece's state so that it can be reused on a new board"""
+        self.enableMovement(False)
+        try:
+            self.signals.released.disconnect()
+        except TypeError:
+            pass
+        self.setOpacity(1)
+        self.show()
+
     def enableMovement(self, movable: bool):
         self.released = False
         self.manual_enabled = movable
@@ -72,64 +75,29 @@ class Piece(QGraphicsPixmapItem):
 
         return super().mouseReleaseEvent(event)
 
-    def move(self, y, x, w, h):
-        self.target = QPointF(w * x, h * y)
-
-        self.move_timer.start(16);
-
-    def explode(self):
-        self.explode_timer.start(16);
-
-    def _fragment(self):
-        self.fragments = []
+    @property
+    def fragments(self) -> List[List[QPixmap]]:
+        pixmap = self.pixmap()
+        key = (pixmap.cacheKey(), self.cutting_number)
+        if key not in Piece.FRAGMENT_CACHE:
+            Piece.FRAGMENT_CACHE[key] = Piece._fragment(pixmap, self.cutting_number)
+        return Piece.FRAGMENT_CACHE[key]
+
+    @staticmethod
+    def _fragment(pixmap: QPixmap, cutting_number: int) -> List[List[QPixmap]]:
+        fragments = []
         
-        fragment_size = int(self.pixmap().height() / self.cutting_number)
+        fragment_size = int(pixmap.height() / cutting_number)
 
-        for i in range(self.cutting_number):
-            self.fragments.append([])
+        for i in range(cutting_number):
+            fragments.append([])
 
-            for j in range(self.cutting_number):
+            for j in range(cutting_number):
                 x = i * fragment_size
                 y = j * fragment_size
-                self.fragments[i].append(self.pixmap().copy(x, y, fragment_size, fragment_size))
-                
-
-    def _explode_tick(self):
-        for fragment, target in self.fragmentItems:
-            pos = fragment.pos()
-
-            dx, dy = target.x() - pos.x(), target.y() - pos.y()
-            dist = math.hypot(dx, dy)
-
-            d_opacity = abs(0 - fragment.opacity())
-
-            if dist <= 1:
-                fragment.setPos(target)
-                self.explode_timer.stop()
-
-            else:
-                step = min(dist, 2)
-                fragment.setPos(pos.x() + dx / dist * step, pos.y() + dy / dist * step)
-
-            if d_opacity <= 0.1:
-                fragment.setOpacity(0)
+                fragments[i].append(pixmap.copy(x, y, fragment_size, fragment_size))
 
-            else:
-                fragment.setOpacity(fragment.opacity() - 0.03)
-
-    def _move_tick(self):
-        pos = self.pos()
-
-        dx, dy = self.target.x() - pos.x(), self.target.y() - pos.y()
-        dist = math.hypot(dx, dy)
-
-        if dist < 1:
-            self.setPos(self.target)
-            self.move_timer.stop()
-
-        else:
-            step = min(dist, self.speed)
-            self.setPos(pos.x() + dx / dist * step, pos.y() + dy / dist * step)
+        return fragments
 
     def string(self):
         return f"{self.type}{self.color}"
@@ -137,28 +105,3 @@ class Piece(QGraphicsPixmapItem):
     def upgrade(self, piece_type, new_pixmap):
         self.setPixmap(new_pixmap)
         self.type = piece_type
-
-        self._fragment()
-
-    def addFragmentItem(self, item: QGraphicsPixmapItem, target: QPointF):
-        self.fragmentItems.append((item, target))
-
-    def __eq__(self, value):
-        if isinstance(value, str):
-            return self.string() == value
-
-        return False
-
-    def __ne__(self, value):
-        if isinstance(value, str):
-            return self.string() != value
-        return not self.__eq__(value)
-
-    def __getitem__(self, idx):
-        if isinstance(idx, slice):
-            return self.string()[idx.start:idx.stop:idx.step]
-
-        return self.string()[idx]
-
-    def __len__(self):
-        return len(self.string())
@@ -1,6 +1,10 @@
-from typing import Dict
+import hashlib
+import os
+from typing import Dict, List
+
+import numpy as np
 from PyQt6 import QtGui
-from PyQt6.QtGui import QColor, QImage, QPixmap
+from PyQt6.QtGui import QImage, QPixmap
 
 from Piece import Piece
 
@@ -41,13 +45,102 @@ class PieceManager:
     }
 
     PIECE_IMAGES: Dict[str, QImage] = {}
+    # Pieces of the previous boards, reused by get_piece. Keyed by type and color
+    PIECE_POOL: Dict[str, List[Piece]] = {}
     CACHE: Dict[str, Dict[str, QPixmap]] = {}
 
+    ASSETS_DIRECTORY = "Data/assets/"
+    # Tinted sprites are saved there, keyed by a hash of the assets and colors
+    CACHE_DIRECTORY = os.path.join(os.path.abspath(os.path.dirname(__file__)), "Data", "cache")
+    USE_DISK_CACHE = True
+
     @staticmethod
     def load_assets():
+        """Load the piece images and tint them for every color"""
+        digest = hashlib.sha1()
         for p in PieceManager.PIECES:
-            image = QtGui.QImage("Data/assets/" + p + ".png")
+            path = PieceManager.ASSETS_DIRECTORY + p + ".png"
+            image = QtGui.QImage(path)
             PieceManager.PIECE_IMAGES[p] = image
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        for color, (col1, col2) in PieceManager.COLORS.items():
+            digest.update(f"{color}{col1.getRgb()}{col2.getRgb()}".encode())
+
+        PieceManager.CACHE = {}
+        PieceManager.PIECE_POOL = {}
+        Piece.FRAGMENT_CACHE = {}
+        cache_path = os.path.join(PieceManager.CACHE_DIRECTORY, f"pieces_{digest.hexdigest()[:16]}.npz")
+        arrays: Dict[str, np.ndarray] = {}
+        if PieceManager.USE_DISK_CACHE and os.path.isfile(cache_path):
+            try:
+                with np.load(cache_path) as data:
+                    arrays = {key: data[key] for key in data.files}
+            except (OSError, ValueError) as e:
+                print(f"Could not read the sprite cache '{cache_path}': {e}")
+                arrays = {}
+
+        missing = False
+        for color in PieceManager.COLORS:
+            PieceManager.CACHE[color] = {}
+            for p in PieceManager.PIECES:
+                key = color + p
+                if key not in arrays:
+                    arrays[key] = PieceManager.tint(PieceManager.PIECE_IMAGES[p], color)
+                    missing = True
+                PieceManager.CACHE[color][p] = QPixmap.fromImage(PieceManager.array_to_image(arrays[key]))
+
+        if PieceManager.USE_DISK_CACHE and missing:
+            try:
+                os.makedirs(PieceManager.CACHE_DIRECTORY, exist_ok=True)
+                np.savez(cache_path, **arrays)
+            except OSError as e:
+                print(f"Could not write the sprite cache '{cache_path}': {e}")
+
+    @staticmethod
+    def image_to_array(image: QImage) -> np.ndarray:
+        """
+        Copy an image into an array
+        :param image: The image, in any format
+        :return: A (height, width, 4) RGBA ``uint8`` array
+        """
+        image = image.convertToFormat(QImage.Format.Format_RGBA8888)
+        width, height = image.width(), image.height()
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        rows = np.frombuffer(bits, dtype=np.uint8).reshape(height, image.bytesPerLine())
+        return rows[:, :width * 4].reshape(height, width, 4).copy()
+
+    @staticmethod
+    def array_to_image(array: np.ndarray) -> QImage:
+        """
+        Build an image from an array
+        :param array: A (height, width, 4) RGBA ``uint8`` array
+        :return: A new image owning its data
+        """
+        array = np.ascontiguousarray(array)
+        height, width = array.shape[:2]
+        return QImage(array.data, width, height, width * 4, QImage.Format.Format_RGBA8888).copy()
+
+    @staticmethod
+    def tint(image: QImage, color: str) -> np.ndarray:
+        """
+        Tint a piece image for a color
+
+        Each pixel is a blend of the color's two tints weighted by the pixel's value
+        (brightest channel), keeping its alpha
+        :param image: The original piece image
+        :param color: The piece color
+        :return: The tinted image as a (height, width, 4) RGBA ``uint8`` array
+        """
+        pixels = PieceManager.image_to_array(image)
+        col1, col2 = PieceManager.COLORS[color]
+        c1 = np.array([col1.red(), col1.green(), col1.blue()], dtype=np.float32)
+        c2 = np.array([col2.red(), col2.green(), col2.blue()], dtype=np.float32)
+
+        f = pixels[..., :3].max(axis=2, keepdims=True).astype(np.float32) / 255
+        pixels[..., :3] = (c1 * f + c2 * (1 - f)).astype(np.uint8)
+        return pixels
 
     @staticmethod
     def get_pixmap(color: str, piece: str):
@@ -58,33 +151,32 @@ class PieceManager:
 
         if piece not in cache[color]:
             piece_img: QImage = PieceManager.PIECE_IMAGES[piece[0]]
-            copy: QImage = piece_img.copy()
-
-            def mix(c1: QColor, c2: QColor, f: float, a: int):
-                return QtGui.QColor(
-                    int(c1.red()   * f + c2.red()   * (1-f)),
-                    int(c1.green() * f + c2.green() * (1-f)),
-                    int(c1.blue()  * f + c2.blue()  * (1-f)),
-                    a
-                )
-
-            col1, col2 = PieceManager.COLORS[color]
-            for py in range(copy.size().height()):
-                for px in range(copy.size().width()):
-                    pixel: QColor = copy.pixelColor(px, py)
-                    copy.setPixelColor(
-                        px, py,
-                        mix(col1, col2, pixel.value() / 255, pixel.alpha())
-                    )
-            cache[color][piece] = QPixmap.fromImage(copy)
+            tinted = PieceManager.tint(piece_img, color)
+            cache[color][piece] = QPixmap.fromImage(PieceManager.array_to_image(tinted))
         
         return cache[color][piece]
 
     @staticmethod
     def get_piece(color: str, piece: str) -> Piece:
+        pool = PieceManager.PIECE_POOL.get(piece + color)
+        if pool:
+            reused = pool.pop()
+            reused.reset()
+            return reused
+
+        # The sprite is shared by all the pieces of the same color and type
         pixmap = PieceManager.get_pixmap(color, piece)
 
-        return Piece(pixmap.copy(), piece, color)
+        return Piece(pixmap, piece, color)
+
+    @staticmethod
+    def release_pieces(pieces: List[Piece]):
+        """
+        Give back pieces which are not used anymore, so that they are reused for the next board
+        :param pieces: The pieces to release
+        """
+        for piece in pieces:
+            PieceManager.PIECE_POOL.setdefault(piece.string(), []).append(piece)
 
     @staticmethod
     def get_piece_name(piece_and_col: str):
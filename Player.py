@@ -1,18 +1,143 @@
 from __future__ import annotations
 
+from typing import Optional
+
 from BotWidget import BotWidget
+from Bots.ChessBotList import ChessBot, create_session, load_bot
+from ParallelPlayer import BotWorker
 
 
 class Player:
     #def __init__(self, team: int, color: str, rotation: int, widget: BotWidget):
-    def __init__(self, color: str, widget: BotWidget):
+    def __init__(self, color: str, widget: BotWidget, worker: Optional[BotWorker] = None):
         #self.team: int = team
         self.color: str = color
         #self.rotation: int = rotation
         self.widget: BotWidget = widget
+        self.worker: Optional[BotWorker] = worker
+        self.session: Optional[ChessBot] = None
+        self.session_name: Optional[str] = None
+        self.clock: Optional[float] = None
 
     def get_budget(self) -> float:
         return self.widget.budgetValue.value()
 
+    def get_increment(self) -> float:
+        return self.widget.incrementValue.value()
+
+    def has_clock(self) -> bool:
+        return self.widget.clockEnabled.isChecked()
+
+    def is_profiled(self) -> bool:
+        return self.widget.profileEnabled.isChecked()
+
+    def reset_clock(self):
+        """Start the game clock from the budget, if enabled"""
+        self.clock = self.get_budget() if self.has_clock() else None
+        self.update_clock_label()
+
+    def get_time_left(self) -> float:
+        """
+        Get the time the player can use for the current turn
+
+        :return: The remaining clock time if the clock is enabled, the fixed budget otherwise
+        """
+        if self.clock is not None:
+            return self.clock
+        return self.get_budget()
+
+    def spend_time(self, time_used: float):
+        """
+        Charge the time used for a turn on the clock, then add the increment
+        :param time_used: The time used, in seconds
+        """
+        if self.clock is None:
+            return
+        self.clock = max(0.0, self.clock - time_used)
+        if self.clock > 0:
+            self.clock += self.get_increment()
+        self.update_clock_label()
+
+    def set_clock(self, clock: Optional[float]):
+        """
+        Set the remaining clock time, e.g. to restore it when a move is undone
+        :param clock: The remaining time in seconds, ``None`` without clock
+        """
+        self.clock = clock
+        self.update_clock_label()
+
+    def update_clock_label(self):
+        text = "--" if self.clock is None else f"{self.clock:.2f}s"
+        self.widget.clockValue.setText(text)
+
     def get_func(self):
-        return self.widget.playerBot.currentText(), self.widget.playerBot.currentData()
+        name = self.widget.playerBot.currentText()
+        return name, load_bot(name)
+
+    def start_session(self, board, player_sequence: str):
+        """
+        Start a new game session for the selected bot
+
+        With a worker, the session lives in the worker process
+        :param board: The initial board, in the player's orientation and in the bot's format
+        :param player_sequence: The player's sequence
+        """
+        name, func = self.get_func()
+        self.session_name = name
+        if self.worker is not None:
+            self.worker.send("start", name, board, player_sequence)
+            return
+        self.session = create_session(func)
+        self.session.on_game_start(board, player_sequence)
+
+    def get_session(self, board, player_sequence: str) -> ChessBot:
+        """
+        Get the local session of the selected bot, starting a new one if the bot changed
+        :param board: The current board, used if a new session must be started
+        :param player_sequence: The player's sequence
+        :return: The session
+        """
+        name, _ = self.get_func()
+        if self.session is None or self.session_name != name:
+            self.start_session(board, player_sequence)
+        return self.session
+
+    def notify_move(self, move):
+        """
+        Notify the session of a move played by any player
+        :param move: The move, in the player's orientation
+        """
+        if self.worker is not None:
+            self.worker.send("move", move)
+        elif self.session is not None:
+            self.session.on_move(move)
+
+    def notify_undo(self, move):
+        """
+        Notify the session that a move was undone
+        :param move: The move, in the player's orientation
+        """
+        if self.worker is not None:
+            self.worker.send("undo", move)
+        elif self.session is not None:
+            self.session.on_undo(move)
+
+    def end_session(self, result: Optional[str]):
+        """
+        End the current game session
+        :param result: The winner's color, or ``None`` if the game was interrupted
+        """
+        if self.session_name is None:
+            return
+        if self.worker is not None:
+            self.worker.send("end", result)
+        elif self.session is not None:
+            self.session.on_game_end(result)
+        self.session = None
+        self.session_name = None
+
+    def close(self):
+        """Stop the player's worker process, if any"""
+        if self.worker is not None:
+            self.worker.close()
+            self.worker = None
@@ -0,0 +1,83 @@
+"""
+Profiling of bot turns
+
+Each profiled turn is saved with cProfile in its own file, in one folder per game,
+and a summary of the hottest functions of each bot is written at the end of the game.
+The files can be opened with :mod:`pstats` or tools such as snakeviz.
+"""
+
+import cProfile
+import glob
+import io
+import os
+import pstats
+from typing import Callable, Optional
+
+
+PROFILE_DIRECTORY = os.path.join(os.path.abspath(os.path.dirname(__file__)), "Data", "profiles")
+SUMMARY_NAME = "summary.txt"
+# Number of functions listed per bot in the summary
+SUMMARY_LIMIT = 25
+
+
+def turn_profile_path(directory: str, ply: int, color: str, bot_name: str) -> str:
+    """
+    Get the path of a turn's profile
+    :param directory: The game's profile folder
+    :param ply: Index of the move in the game
+    :param color: Color of the player
+    :param bot_name: Name of the bot
+    :return: The path of the profile file
+    """
+    return os.path.join(directory, f"ply{ply:04d}_{color}_{bot_name}.prof")
+
+
+def run_profiled(path: Optional[str], function: Callable, *args, **kwargs):
+    """
+    Call a function, under cProfile if a path is given
+
+    Only the calling thread is profiled. The profile is saved even if the function raises
+    :param path: Where to save the profile, or ``None`` to call the function normally
+    :return: The function's result
+    """
+    if path is None:
+        return function(*args, **kwargs)
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        profiler.disable()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            profiler.dump_stats(path)
+        except OSError as e:
+            print(f"Could not save the profile '{path}': {e}")
+
+
+def write_summary(directory: str, limit: int = SUMMARY_LIMIT) -> Optional[str]:
+    """
+    Aggregate the turn profiles of a game folder, per player and bot, and write the hottest functions
+    :param directory: The game's profile folder
+    :param limit: Number of functions listed per player
+    :return: The path of the summary, or ``None`` if there is no profile in the folder
+    """
+    groups = {}
+    for path in sorted(glob.glob(os.path.join(directory, "ply*.prof"))):
+        # ply0012_w_Gambit.prof -> w_Gambit
+        player = os.path.basename(path)[:-len(".prof")].split("_", 1)[1]
+        groups.setdefault(player, []).append(path)
+    if not groups:
+        return None
+
+    summary_path = os.path.join(directory, SUMMARY_NAME)
+    with open(summary_path, "w") as f:
+        for player, paths in groups.items():
+            stream = io.StringIO()
+            stats = pstats.Stats(*paths, stream=stream)
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(limit)
+            f.write(f"===== {player}: {len(paths)} turn(s) =====\n")
+            f.write(stream.getvalue())
+            f.write("\n")
+    return summary_path
@@ -0,0 +1,173 @@
+"""
+Batch analysis of saved positions, without the GUI
+
+Runs a registered bot on every position of the given files (.brd, or .fen/.epd with one position
+per line) and streams one JSON line per position to stdout as soon as it is analysed.
+Everything else (bot output, parsing errors) is printed on stderr.
+
+*Example*::
+
+    python analyse.py Data/maps/*.brd positions.fen --bot Gambit --depth 4 --jobs 8
+
+With ``--multipv K``, bots supporting it also report their ``K`` best moves in ``stats["lines"]``,
+each with its score, search depth and principal variation.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+import numpy as np
+
+import BoardCodes
+from BoardFormats import read_positions
+from Bots.ChessBotList import discover_bots
+from ChessRules import rotate_coordinates
+from Profiling import PROFILE_DIRECTORY, run_profiled, turn_profile_path, write_summary
+
+
+def init_worker():
+    """Initializer of the pool processes"""
+    # Keep stdout for the results
+    sys.stdout = sys.stderr
+
+
+def analyse_position(task: dict) -> dict:
+    """
+    Run a bot on a single position
+
+    The bot plays the first player of the sequence, on the board in its own orientation.
+    The move is given back in board coordinates, like in game logs
+    :param task: The position (``name``, ``player_order``, ``board``) and the analysis settings
+                 (``bot``, ``budget``, ``kwargs``, ``profile_path``)
+    :return: The result record
+    """
+    from Bots.ChessBotList import create_session, load_bot
+
+    sequence: str = task["player_order"][:3]
+    result = {
+        "index": task["index"],
+        "position": task["name"],
+        "player": sequence[1],
+        "bot": task["bot"],
+    }
+
+    rot = int(sequence[2])
+    board = np.rot90(task["board"], rot)
+    session = create_session(load_bot(task["bot"]))
+    if session.compact_board:
+        bot_board = BoardCodes.encode(board)
+        bot_board.setflags(write=False)
+    else:
+        bot_board = np.array(board.tolist())
+
+    try:
+        start_time = time.perf_counter()
+        session.on_game_start(bot_board, sequence)
+        start, end = run_profiled(task["profile_path"], session.choose_move, bot_board, task["budget"], **task["kwargs"])
+        result["time"] = time.perf_counter() - start_time
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    def to_board(move):
+        return [list(rotate_coordinates(board.shape, (int(pos[0]), int(pos[1])), rot)) for pos in move]
+
+    result["move"] = to_board((start, end))
+    result["stats"] = dict(session.stats)
+    if "lines" in result["stats"]:
+        # The principal variations are given in board coordinates too
+        result["stats"]["lines"] = [
+            dict(line, move=to_board(line["move"]), pv=[to_board(move) for move in line["pv"]])
+            for line in result["stats"]["lines"]
+        ]
+    return result
+
+
+def write_result(out, result: dict):
+    out.write(json.dumps(result, default=str) + "\n")
+    out.flush()
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyse positions with a registered bot and print JSONL results")
+    parser.add_argument("paths", nargs="*", help=".brd files, .fen/.epd files with one position per line, or packed .pbrd files")
+    parser.add_argument("--bot", default="Gambit", help="Name of the bot to run (default: Gambit)")
+    parser.add_argument("--budget", type=float, default=1.0, help="Time budget per position, in seconds (default: 1)")
+    parser.add_argument("--depth", type=int, default=None, help="Maximum search depth, for bots supporting it")
+    parser.add_argument("--nodes", type=int, default=None, help="Maximum number of nodes, for bots supporting it")
+    parser.add_argument("--multipv", type=int, default=None,
+                        help="Number of best moves to report with their principal variations, for bots supporting it")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Number of worker processes (default: one per CPU)")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Save a cProfile profile per position and a summary in {PROFILE_DIRECTORY}")
+    parser.add_argument("--list", action="store_true", help="List the registered bots and exit")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout
+    sys.stdout = sys.stderr
+
+    bots = discover_bots()
+    if args.list:
+        for name in bots:
+            out.write(name + "\n")
+        return 0
+
+    if args.bot not in bots:
+        print(f"Unknown bot '{args.bot}', available bots: {', '.join(bots)}")
+        return 1
+
+    kwargs = {}
+    if args.depth is not None:
+        kwargs["max_depth"] = args.depth
+    if args.nodes is not None:
+        kwargs["max_nodes"] = args.nodes
+    if args.multipv is not None:
+        kwargs["multipv"] = args.multipv
+
+    profile_directory = None
+    if args.profile:
+        profile_directory = os.path.join(PROFILE_DIRECTORY, time.strftime("analysis_%Y%m%d_%H%M%S") + f"_{os.getpid()}")
+
+    tasks = []
+    for path in args.paths:
+        if not os.path.isfile(path):
+            print(f"File '{path}' not found")
+            continue
+        for name, player_order, board in read_positions(path):
+            profile_path = None
+            if profile_directory is not None:
+                profile_path = turn_profile_path(profile_directory, len(tasks), player_order[1], args.bot)
+            tasks.append({
+                "index": len(tasks),
+                "name": name,
+                "player_order": player_order,
+                "board": board,
+                "bot": args.bot,
+                "budget": args.budget,
+                "kwargs": kwargs,
+                "profile_path": profile_path,
+            })
+
+    if args.jobs <= 1:
+        for task in tasks:
+            write_result(out, analyse_position(task))
+    else:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, max(1, len(tasks))), initializer=init_worker) as pool:
+            futures = [pool.submit(analyse_position, task) for task in tasks]
+            for future in as_completed(futures):
+                write_result(out, future.result())
+
+    if profile_directory is not None:
+        summary = write_summary(profile_directory)
+        if summary is not None:
+            print(f"Profiling summary saved in '{summary}'")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Startup time benchmark of the arena
+
+Launches the arena several times in fresh processes and reports how long each phase takes,
+from the interpreter start to the first event loop iteration:
+
+- ``imports``: importing the GUI modules
+- ``window``: creating the application and the main window (UI setup, assets, bot discovery)
+- ``start``: loading the board and creating the player widgets and bot workers
+- ``total``: everything, including the interpreter start
+
+*Example*::
+
+    python benchmark_startup.py --runs 10 --offscreen
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PHASES = ("imports", "window", "start", "total")
+
+
+def child():
+    """Start the arena once, quit at the first event loop iteration and print the timings as JSON"""
+    # Time since the process was created, as seen by the parent
+    launch_time = float(os.environ["BENCHMARK_LAUNCH_TIME"])
+    timings = {}
+
+    t = time.time()
+    from PyQt6.QtCore import QTimer
+    from ChessArena import ChessApp, ChessArena
+    timings["imports"] = time.time() - t
+
+    t = time.time()
+    app = ChessApp()
+    arena = ChessArena()
+    arena.show()
+    timings["window"] = time.time() - t
+
+    t = time.time()
+    arena.start()
+    timings["start"] = time.time() - t
+
+    def done():
+        timings["total"] = time.time() - launch_time
+        arena.game_manager.reset()
+        app.quit()
+
+    QTimer.singleShot(0, done)
+    app.exec()
+    sys.__stdout__.write(json.dumps(timings) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the startup time of the arena")
+    parser.add_argument("--runs", type=int, default=5, help="Number of launches (default: 5)")
+    parser.add_argument("--offscreen", action="store_true", help="Don't show any window (Qt offscreen platform)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    env = dict(os.environ)
+    if args.offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+
+    results = {phase: [] for phase in PHASES}
+    for run in range(args.runs):
+        env["BENCHMARK_LAUNCH_TIME"] = repr(time.time())
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child"],
+            cwd=os.path.abspath(os.path.dirname(__file__)),
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        lines = [line for line in output.stdout.splitlines() if line.startswith("{")]
+        if output.returncode != 0 or not lines:
+            print(f"Run {run + 1} failed:\n{output.stderr}")
+            return 1
+        timings = json.loads(lines[-1])
+        for phase in PHASES:
+            results[phase].append(timings[phase])
+        print(f"Run {run + 1}: " + ", ".join(f"{phase} {timings[phase] * 1000:.0f}ms" for phase in PHASES))
+
+    print()
+    print(f"{'phase':<8} {'min':>8} {'median':>8} {'max':>8}")
+    for phase in PHASES:
+        values = results[phase]
+        print(
+            f"{phase:<8} {min(values) * 1000:>6.0f}ms {statistics.median(values) * 1000:>6.0f}ms "
+            f"{max(values) * 1000:>6.0f}ms"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,461 @@
+"""
+Self-play data generation, without the GUI
+
+Plays many games between registered bots in parallel worker processes and records every ply:
+the board codes in the orientation of the player to move (see :mod:`BoardCodes`), the color of that
+player, the score of its search and the final result of the game from its point of view
+(1 for a win, 0 for a draw or an unfinished game, -1 for a loss).
+On a non-square board with players on the sides, the boards are padded with holes to a square,
+so that every position has the same shape.
+
+Positions are streamed into ``.npz`` shards of at most ``--shard-size`` positions, each holding
+whole games, listed in a ``manifest.json`` file. Running the same command again resumes the generation:
+the games already saved in a shard are skipped.
+
+*Example*::
+
+    python selfplay.py --bots Gambit,Gambit --games 1000 --depth 2 --jobs 8 --output Data/selfplay/default
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import BoardCodes
+from BoardGeometry import BoardGeometry
+from BoardManager import BoardManager
+from ChessRules import move_is_valid, rotate_coordinates
+
+SELFPLAY_DIRECTORY = os.path.join(os.path.abspath(os.path.dirname(__file__)), "Data", "selfplay")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Arrays saved in every shard, one entry per position
+SHARD_FIELDS = {
+    "codes": np.uint8,
+    "side": np.uint8,
+    "score": np.float32,
+    "result": np.int8,
+    "game": np.uint32,
+    "ply": np.uint16,
+}
+
+
+def init_worker(verbose: bool):
+    """Initializer of the pool processes"""
+    # Bots and rules print on every move
+    sys.stdout = sys.stderr if verbose else open(os.devnull, "w")
+
+
+def random_move(board: np.ndarray, sequence: str, full_sequence: str, rng: random.Random):
+    """
+    Pick a random valid move, used to vary the openings of deterministic bots
+    :param board: The board in the player's orientation
+    :param sequence: The player's sequence
+    :param full_sequence: The full player sequence, starting with the player
+    :param rng: The random generator of the game
+    :return: The move, or ``None`` if the player can't move
+    """
+    from Bots.Gambit_utils import generate_moves
+
+    moves = [move for move in generate_moves(board, sequence[1]) if move_is_valid(full_sequence, move, board)]
+    if not moves:
+        return None
+    return rng.choice(moves)
+
+
+def play_game(task: dict) -> dict:
+    """
+    Play a single game and record every ply
+    :param task: The game (``game``, ``path``, ``index``, ``seed``) and the settings (``bots``, ``budget``,
+                 ``kwargs``, ``max_plies``, ``random_plies``)
+    :return: The game id, the winner's color and the recorded arrays (see ``SHARD_FIELDS``)
+    """
+    from Bots.ChessBotList import create_session, load_bot
+
+    board_manager = BoardManager()
+    if not board_manager.load_file(task["path"], task["index"]):
+        return {"game": task["game"], "error": f"Could not load position {task['index']} of '{task['path']}'"}
+    board = board_manager.board
+    codes = board_manager.codes
+    order: str = board_manager.player_order
+    player_count = len(order) // 3
+    record_shape = (max(board.shape),) * 2 if any(int(r) % 2 for r in order[2::3]) else board.shape
+    rng = random.Random(task["seed"])
+
+    sessions = []
+    for i in range(player_count):
+        sequence = order[i * 3: i * 3 + 3]
+        session = create_session(load_bot(task["bots"][i % len(task["bots"])]))
+        session.on_game_start(player_board(session, board, codes, int(sequence[2])), sequence)
+        sessions.append(session)
+
+    records: Dict[str, list] = {"codes": [], "side": [], "score": [], "ply": []}
+    colors: List[str] = []
+    winner: Optional[str] = None
+    start_time = time.perf_counter()
+
+    for ply in range(task["max_plies"]):
+        turn = ply % player_count
+        sequence = order[turn * 3: turn * 3 + 3]
+        color, rot = sequence[1], int(sequence[2])
+        session = sessions[turn]
+        view = np.rot90(board, rot)
+        full_sequence = order[turn * 3:] + order[:turn * 3]
+
+        score = np.nan
+        if ply < task["random_plies"]:
+            move = random_move(view, sequence, full_sequence, rng)
+        else:
+            try:
+                move = session.choose_move(player_board(session, board, codes, rot), task["budget"], **task["kwargs"])
+                score = session.stats.get("score")
+                score = np.nan if score is None else float(score)
+            except Exception as e:
+                print(f"Game {task['game']}: {type(e).__name__}: {e}")
+                move = None
+
+        records["codes"].append(pad_codes(np.rot90(codes, rot), record_shape))
+        records["side"].append(BoardCodes.COLORS.index(color))
+        records["score"].append(score)
+        records["ply"].append(ply)
+        colors.append(color)
+
+        if move is None or not move_is_valid(full_sequence, move, view):
+            # A player without any valid move loses, like with the arena's rules
+            others = [c for c in order[1::3] if c != color]
+            winner = others[0] if len(others) == 1 else None
+            break
+
+        start, end = (int(move[0][0]), int(move[0][1])), (int(move[1][0]), int(move[1][1]))
+        piece = view[start]
+        if piece[0] == "p" and end in BoardGeometry.of(view).promotion[0]:
+            piece = "q" + color
+        real_start = rotate_coordinates(view.shape, start, rot)
+        real_end = rotate_coordinates(view.shape, end, rot)
+        board[real_end] = piece
+        board[real_start] = ""
+        codes[real_end] = BoardCodes.STRING_TO_CODE[piece]
+        codes[real_start] = BoardCodes.EMPTY
+
+        for i, other in enumerate(sessions):
+            other_rot = int(order[i * 3 + 2])
+            other.on_move((
+                rotate_coordinates(board.shape, real_start, -other_rot),
+                rotate_coordinates(board.shape, real_end, -other_rot),
+            ))
+
+        # Same end condition as the arena: every opponent king was captured
+        if not any(tile[0] == "k" and tile[1] != color for tile in board.flat if tile not in ("", "XX")):
+            winner = color
+            break
+
+    for session in sessions:
+        session.on_game_end(winner)
+
+    if winner is None:
+        results = [0] * len(colors)
+    else:
+        results = [1 if color == winner else -1 for color in colors]
+
+    arrays = {
+        "codes": np.array(records["codes"], dtype=np.uint8),
+        "side": np.array(records["side"], dtype=np.uint8),
+        "score": np.array(records["score"], dtype=np.float32),
+        "result": np.array(results, dtype=np.int8),
+        "game": np.full(len(colors), task["game"], dtype=np.uint32),
+        "ply": np.array(records["ply"], dtype=np.uint16),
+    }
+    return {"game": task["game"], "winner": winner, "arrays": arrays, "time": time.perf_counter() - start_time}
+
+
+def pad_codes(codes: np.ndarray, shape: tuple) -> np.ndarray:
+    """
+    Center codes in a board of the given shape, the added tiles being holes
+    """
+    if codes.shape == tuple(shape):
+        return codes.copy()
+    padded = np.full(shape, BoardCodes.HOLE, dtype=np.uint8)
+    top = (shape[0] - codes.shape[0]) // 2
+    left = (shape[1] - codes.shape[1]) // 2
+    padded[top:top + codes.shape[0], left:left + codes.shape[1]] = codes
+    return padded
+
+
+def player_board(session, board: np.ndarray, codes: np.ndarray, rot: int) -> np.ndarray:
+    """
+    Get the board in a player's orientation, in the format expected by its bot
+    :param session: The bot session
+    :param board: The real board
+    :param codes: The real code array
+    :param rot: Number of rotations of the player's orientation
+    :return: A read-only view of the code array for compact bots, a string matrix otherwise
+    """
+    if session.compact_board:
+        view = np.rot90(codes, rot).view()
+        view.setflags(write=False)
+        return view
+    return np.array(np.rot90(board, rot).tolist())
+
+
+class ShardWriter:
+    """
+    Buffer of recorded games, saved in ``.npz`` shards of at most ``shard_size`` positions
+
+    Shards only hold whole games and the manifest is updated after every shard,
+    so an interrupted generation can be resumed from the manifest
+    """
+
+    def __init__(self, directory: str, manifest: dict):
+        self.directory: str = directory
+        self.manifest: dict = manifest
+        self.shard_size: int = manifest["shard_size"]
+        self.games: List[dict] = []
+        self.count: int = 0
+
+    def done_games(self) -> set:
+        """Ids of the games already saved"""
+        return {game for shard in self.manifest["shards"] for game in shard["games"]}
+
+    def add(self, game: dict):
+        """
+        Add a recorded game, saving the current shard first if the game doesn't fit in it
+        :param game: The result of :func:`play_game`
+        """
+        positions = len(game["arrays"]["side"])
+        if self.count + positions > self.shard_size:
+            self.flush()
+        self.games.append(game)
+        self.count += positions
+        if self.count >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        """Save the buffered games in a new shard and update the manifest"""
+        if not self.games:
+            return
+        name = f"shard_{len(self.manifest['shards']):05d}.npz"
+        arrays = {
+            field: np.concatenate([game["arrays"][field] for game in self.games])
+            for field in SHARD_FIELDS
+        }
+        path = os.path.join(self.directory, name)
+        np.savez_compressed(path + ".tmp.npz", **arrays)
+        os.replace(path + ".tmp.npz", path)
+
+        self.manifest["shards"].append({
+            "file": name,
+            "positions": self.count,
+            "games": sorted(game["game"] for game in self.games),
+        })
+        write_manifest(self.directory, self.manifest)
+        self.games = []
+        self.count = 0
+
+
+def write_manifest(directory: str, manifest: dict):
+    """
+    Save a manifest, replacing the previous one atomically
+    :param directory: The output folder
+    :param manifest: The manifest
+    """
+    path = os.path.join(directory, MANIFEST_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def load_shards(directory: str) -> Dict[str, np.ndarray]:
+    """
+    Load every shard listed in a manifest
+    :param directory: The output folder of a generation
+    :return: The concatenated arrays (see ``SHARD_FIELDS``)
+    """
+    with open(os.path.join(directory, MANIFEST_NAME), "r") as f:
+        manifest = json.load(f)
+    shards = []
+    for shard in manifest["shards"]:
+        with np.load(os.path.join(directory, shard["file"])) as data:
+            shards.append({field: data[field] for field in SHARD_FIELDS})
+    if not shards:
+        return {field: np.array([], dtype=dtype) for field, dtype in SHARD_FIELDS.items()}
+    return {field: np.concatenate([shard[field] for shard in shards]) for field in SHARD_FIELDS}
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate training positions by self-play")
+    parser.add_argument("--bots", default="Gambit", help="Comma-separated bots, one per player (default: Gambit)")
+    parser.add_argument("--board", default=BoardManager.DEFAULT_BOARD,
+                        help="Starting board. With a multi-position file, game i starts from position i modulo the count")
+    parser.add_argument("--games", type=int, default=100, help="Number of games to play (default: 100)")
+    parser.add_argument("--budget", type=float, default=1.0, help="Time budget per move, in seconds (default: 1)")
+    parser.add_argument("--depth", type=int, default=None, help="Maximum search depth, for bots supporting it")
+    parser.add_argument("--nodes", type=int, default=None, help="Maximum number of nodes, for bots supporting it")
+    parser.add_argument("--max-plies", type=int, default=200, help="Plies after which a game is a draw (default: 200)")
+    parser.add_argument("--random-plies", type=int, default=4,
+                        help="Number of random opening plies, to vary the games (default: 4)")
+    parser.add_argument("--shard-size", type=int, default=100_000, help="Maximum positions per shard (default: 100000)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random openings (default: 0)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Number of worker processes (default: one per CPU)")
+    parser.add_argument("--output", default=None, help=f"Output folder (default: a new folder in {SELFPLAY_DIRECTORY})")
+    parser.add_argument("--verbose", action="store_true", help="Show the output of the bots on stderr")
+    args = parser.parse_args(argv)
+
+    board_manager = BoardManager()
+    position_count = board_manager.get_position_count(args.board)
+    if position_count == 0 or not board_manager.load_file(args.board):
+        return 1
+
+    output = args.output
+    if output is None:
+        output = os.path.join(SELFPLAY_DIRECTORY, time.strftime("selfplay_%Y%m%d_%H%M%S"))
+    os.makedirs(output, exist_ok=True)
+
+    settings = {
+        "bots": args.bots.split(","),
+        "board": os.path.abspath(args.board),
+        "budget": args.budget,
+        "max_depth": args.depth,
+        "max_nodes": args.nodes,
+        "max_plies": args.max_plies,
+        "random_plies": args.random_plies,
+        "seed": args.seed,
+    }
+    manifest_path = os.path.join(output, MANIFEST_NAME)
+    if os.path.isfile(manifest_path):
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        if manifest["settings"] != settings or manifest["shard_size"] != args.shard_size:
+            print(f"'{output}' was generated with other settings, use another output folder")
+            return 1
+    else:
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "fields": list(SHARD_FIELDS),
+            "colors": BoardCodes.COLORS,
+            "player_order": board_manager.player_order,
+            "settings": settings,
+            "shard_size": args.shard_size,
+            "shards": [],
+        }
+        write_manifest(output, manifest)
+
+    writer = ShardWriter(output, manifest)
+    done = writer.done_games()
+    kwargs = {}
+    if args.depth is not None:
+        kwargs["max_depth"] = args.depth
+    if args.nodes is not None:
+        kwargs["max_nodes"] = args.nodes
+    tasks = [
+        {
+            "game": game,
+            "path": args.board,
+            "index": game % position_count,
+            "seed": args.seed * 1_000_003 + game,
+            "bots": settings["bots"],
+            "budget": args.budget,
+            "kwargs": kwargs,
+            "max_plies": args.max_plies,
+            "random_plies": args.random_plies,
+        }
+        for game in range(args.games)
+        if game not in done
+    ]
+    print(f"{len(done)} game(s) already saved, {len(tasks)} to play in '{output}'", file=sys.stderr)
+
+    start_time = time.perf_counter()
+    played = 0
+    positions = 0
+    # Only a few games are queued per worker, so finished games never pile up in memory
+    max_pending = 2 * max(1, args.jobs)
+    queue = deque(tasks)
+    # Games which were pending when a worker process died, played again one at a time
+    suspects = deque()
+
+    def save(future, task: dict):
+        nonlocal played, positions
+        try:
+            game = future.result()
+        except Exception as e:
+            # A game which raises an exception in its worker is skipped, the others go on
+            print(f"Game {task['game']}: {type(e).__name__}: {e}", file=sys.stderr)
+            return
+        if "error" in game:
+            print(f"Game {game['game']}: {game['error']}", file=sys.stderr)
+            return
+        writer.add(game)
+        played += 1
+        positions += len(game["arrays"]["side"])
+        print(
+            f"Game {game['game']}: {len(game['arrays']['side'])} plies, winner {game['winner']} "
+            f"({game['time']:.1f}s) - {played}/{len(tasks)} games, {positions} positions, "
+            f"{positions / (time.perf_counter() - start_time):.0f} positions/s",
+            file=sys.stderr,
+        )
+
+    try:
+        # A new pool is created whenever a worker process dies (crash, out of memory, ...),
+        # since the pool can't run any game after that
+        while queue or suspects:
+            with ProcessPoolExecutor(max_workers=max(1, args.jobs), initializer=init_worker,
+                                     initargs=(args.verbose,)) as pool:
+                # Task of every pending future
+                pending: Dict[Future, dict] = {}
+                alone = False
+                try:
+                    while True:
+                        if alone and pending:
+                            # A suspect played alone which kills its worker again is the culprit
+                            pass
+                        elif suspects:
+                            alone = True
+                            task = suspects.popleft()
+                            try:
+                                pending[pool.submit(play_game, task)] = task
+                            except BrokenProcessPool:
+                                suspects.appendleft(task)
+                                raise
+                        else:
+                            alone = False
+                            while queue and len(pending) < max_pending:
+                                task = queue.popleft()
+                                try:
+                                    pending[pool.submit(play_game, task)] = task
+                                except BrokenProcessPool:
+                                    queue.appendleft(task)
+                                    raise
+                        if not pending:
+                            break
+                        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            if isinstance(future.exception(), BrokenProcessPool):
+                                raise future.exception()
+                            save(future, pending.pop(future))
+                except BrokenProcessPool:
+                    for future, task in pending.items():
+                        if future.done() and not isinstance(future.exception(), BrokenProcessPool):
+                            save(future, task)
+                        elif alone:
+                            # Not saved, so a resumed generation plays it again
+                            print(f"Game {task['game']}: worker process died, skipped", file=sys.stderr)
+                        else:
+                            suspects.append(task)
+                    if not alone:
+                        print(f"Worker process died, playing {len(suspects)} game(s) again", file=sys.stderr)
+    finally:
+        writer.flush()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
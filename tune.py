@@ -0,0 +1,189 @@
+"""
+Texel tuning of the Gambit evaluation, without the GUI
+
+Loads the positions generated by ``selfplay.py``, builds the feature matrix of every position
+(see :mod:`Bots.Gambit_eval`) and fits the weights so that ``sigmoid(k * evaluation)`` predicts
+the result of the game from the point of view of the player to move (1 for a win, 0.5 for a draw, 0 for a loss).
+
+All the evaluations are computed at once as a matrix-vector product, and the weights are updated with
+full-batch gradient steps (Adam), so a million positions are tuned in a few minutes on a CPU.
+The king material is never tuned: it only matters once a king is captured.
+
+*Example*::
+
+    python tune.py Data/selfplay/default --iterations 1000 --output Bots/Gambit_weights.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from Bots import Gambit_eval
+from selfplay import MANIFEST_NAME, load_shards
+
+
+def load_positions(directories: list, min_ply: Optional[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Load the positions of several self-play folders
+    :param directories: The output folders of selfplay.py
+    :param min_ply: Positions before this ply are skipped (default: the random plies of each folder)
+    :return: The feature matrix, the targets in [0, 1] and the game ids (unique across folders)
+    """
+    features = []
+    targets = []
+    games = []
+    game_offset = 0
+    for directory in directories:
+        with open(os.path.join(directory, MANIFEST_NAME), "r") as f:
+            manifest = json.load(f)
+        data = load_shards(directory)
+        if len(data["side"]) == 0:
+            print(f"No position in '{directory}'", file=sys.stderr)
+            continue
+        skip = manifest["settings"]["random_plies"] if min_ply is None else min_ply
+        kept = data["ply"] >= skip
+        features.append(Gambit_eval.feature_matrix(data["codes"][kept], data["side"][kept]))
+        targets.append((data["result"][kept].astype(np.float64) + 1) / 2)
+        games.append(data["game"][kept].astype(np.int64) + game_offset)
+        game_offset += int(data["game"].max()) + 1
+        print(f"{kept.sum()} positions from '{directory}'", file=sys.stderr)
+    if not features:
+        return np.zeros((0, Gambit_eval.FEATURE_COUNT), dtype=np.float32), np.zeros(0), np.zeros(0, dtype=np.int64)
+    return np.concatenate(features), np.concatenate(targets), np.concatenate(games)
+
+
+def sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-np.clip(x, -500, 500)))
+
+
+def loss(features: np.ndarray, targets: np.ndarray, weights: np.ndarray, k: float) -> float:
+    """
+    Mean squared error between the predicted and the actual results
+    """
+    if len(targets) == 0:
+        return float('nan')
+    return float(np.mean((targets - sigmoid(k * (features @ weights))) ** 2))
+
+
+def fit_scale(features: np.ndarray, targets: np.ndarray, weights: np.ndarray) -> float:
+    """
+    Find the scale k minimizing the loss of the given weights, by a golden-section search on log10(k)
+    """
+    evaluations = features @ weights
+
+    def scale_loss(log_k):
+        return np.mean((targets - sigmoid(10 ** log_k * evaluations)) ** 2)
+
+    low, high = -6.0, 0.0
+    ratio = (np.sqrt(5) - 1) / 2
+    for _ in range(60):
+        a = high - ratio * (high - low)
+        b = low + ratio * (high - low)
+        if scale_loss(a) < scale_loss(b):
+            high = b
+        else:
+            low = a
+    return float(10 ** ((low + high) / 2))
+
+
+def tune(features: np.ndarray, targets: np.ndarray, weights: np.ndarray, k: float, iterations: int,
+         learning_rate: float, validation: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> np.ndarray:
+    """
+    Minimize the loss with full-batch Adam steps
+    :param features: The feature matrix (positions x features)
+    :param targets: The results of the positions, in [0, 1]
+    :param weights: The initial weights
+    :param k: The scale of the evaluations in the sigmoid
+    :param iterations: Number of gradient steps
+    :param learning_rate: Step size, in evaluation units
+    :param validation: Features and targets of positions used to report the loss, not to tune
+    :return: The tuned weights
+    """
+    weights = weights.astype(np.float32)
+    frozen = np.zeros(Gambit_eval.FEATURE_COUNT, dtype=bool)
+    frozen[Gambit_eval.material_feature(Gambit_eval.PIECE_INDEX['k'])] = True
+
+    beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+    moment = np.zeros_like(weights)
+    velocity = np.zeros_like(weights)
+    count = len(targets)
+    report = max(1, iterations // 20)
+    start_time = time.perf_counter()
+    for step in range(1, iterations + 1):
+        predictions = sigmoid(k * (features @ weights))
+        # Derivative of the mean squared error with respect to every evaluation
+        errors = (predictions - targets) * predictions * (1 - predictions) * (2 * k / count)
+        gradient = (errors.astype(np.float32) @ features)
+        gradient[frozen] = 0
+
+        moment = beta1 * moment + (1 - beta1) * gradient
+        velocity = beta2 * velocity + (1 - beta2) * gradient ** 2
+        corrected_moment = moment / (1 - beta1 ** step)
+        corrected_velocity = velocity / (1 - beta2 ** step)
+        weights -= learning_rate * corrected_moment / (np.sqrt(corrected_velocity) + epsilon)
+
+        if step % report == 0 or step == iterations:
+            message = f"Iteration {step}/{iterations}: loss {loss(features, targets, weights, k):.6f}"
+            if validation is not None and len(validation[1]):
+                message += f", validation {loss(*validation, weights, k):.6f}"
+            print(f"{message} ({time.perf_counter() - start_time:.1f}s)", file=sys.stderr)
+    return weights.astype(np.float64)
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tune the Gambit evaluation on self-play positions")
+    parser.add_argument("directories", nargs="+", help="Output folders of selfplay.py")
+    parser.add_argument("--weights", default=Gambit_eval.WEIGHTS_PATH,
+                        help="Initial weights (default: the weights used by Gambit)")
+    parser.add_argument("--output", default=Gambit_eval.WEIGHTS_PATH,
+                        help="Tuned weights file (default: the weights used by Gambit)")
+    parser.add_argument("--iterations", type=int, default=1000, help="Number of gradient steps (default: 1000)")
+    parser.add_argument("--learning-rate", type=float, default=1.0,
+                        help="Step size, in evaluation units (default: 1)")
+    parser.add_argument("--k", type=float, default=None,
+                        help="Scale of the evaluations in the sigmoid (default: fitted on the initial weights)")
+    parser.add_argument("--min-ply", type=int, default=None,
+                        help="Skip the positions before this ply (default: the random plies of the self-play)")
+    parser.add_argument("--validation", type=float, default=0.1,
+                        help="Fraction of the games kept to measure the loss (default: 0.1)")
+    args = parser.parse_args(argv)
+
+    load_start = time.perf_counter()
+    features, targets, games = load_positions(args.directories, args.min_ply)
+    if len(targets) == 0:
+        print("No position to tune on")
+        return 1
+    print(f"{len(targets)} positions loaded in {time.perf_counter() - load_start:.1f}s", file=sys.stderr)
+
+    # Whole games are kept for validation, positions of the same game being strongly correlated
+    held_out = np.random.default_rng(0).random(int(games.max()) + 1) < args.validation
+    validation = held_out[games]
+    train_features, train_targets = features[~validation], targets[~validation]
+    validation_set = (features[validation], targets[validation])
+
+    weights = Gambit_eval.load_weights(args.weights)
+    k = args.k if args.k is not None else fit_scale(train_features, train_targets, weights)
+    print(f"k = {k:.6g}, initial loss {loss(train_features, train_targets, weights, k):.6f}", file=sys.stderr)
+
+    weights = tune(train_features, train_targets, weights, k, args.iterations, args.learning_rate, validation_set)
+
+    info = {
+        "k": k,
+        "positions": int(len(train_targets)),
+        "loss": loss(train_features, train_targets, weights, k),
+        "validation_positions": int(validation.sum()),
+        "validation_loss": loss(*validation_set, weights, k) if validation.any() else None,
+        "sources": [os.path.abspath(directory) for directory in args.directories],
+    }
+    Gambit_eval.save_weights(args.output, weights, info)
+    print(f"Weights saved in '{args.output}'", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())